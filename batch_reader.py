@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+Procesamiento masivo de lecturas en varios procesos, manteniendo el orden de entrada.
+
+    python -m batch_reader lecturas.txt -o documentos.jsonl --workers 8 --chunksize 2000
+
+Cada línea de la entrada es una lectura. La salida es JSON Lines, una línea por lectura y en el mismo orden, con
+los atributos del Document procesado o el motivo de rechazo. Al finalizar se informa el rendimiento por stderr.
+"""
+import json
+import sys
+from argparse import ArgumentParser
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from os import cpu_count
+from time import perf_counter
+
+from document_reader import Document, ModoLectura
+
+CHUNKSIZE = 1000
+
+
+class Rendimiento(object):
+    """
+    Contadores de un procesamiento masivo: lecturas totales, procesadas, rechazadas y tiempo transcurrido
+    """
+
+    def __init__(self):
+        self.lecturas = 0
+        self.procesadas = 0
+        self.rechazadas = 0
+        self.inicio = perf_counter()
+        self.fin = None
+
+    @property
+    def segundos(self):
+        return (self.fin or perf_counter()) - self.inicio
+
+    @property
+    def lecturas_por_segundo(self):
+        return self.lecturas / self.segundos if self.segundos else 0.0
+
+    def __str__(self):
+        return "%d lecturas (%d procesadas, %d rechazadas) en %.2f s: %.0f lecturas/s" % (
+            self.lecturas, self.procesadas, self.rechazadas, self.segundos, self.lecturas_por_segundo)
+
+
+def _bloques(lecturas, chunksize):
+    lecturas = iter(lecturas)
+    inicio = 0
+    bloque = list(islice(lecturas, chunksize))
+    while bloque:
+        yield inicio, bloque
+        inicio += len(bloque)
+        bloque = list(islice(lecturas, chunksize))
+
+
+def _procesar_bloque(inicio, lecturas, modo):
+    return [lectura._replace(numero=lectura.numero + inicio) for lectura in Document.parse_many(lecturas, modo)]
+
+
+def parse_batch(lecturas, workers=None, chunksize=CHUNKSIZE, modo=ModoLectura.REGEX, rendimiento=None):
+    """
+    Generador equivalente a Document.parse_many, que reparte las lecturas en bloques de chunksize entre workers
+    procesos (por defecto, uno por CPU). Las Lecturas se retornan en el orden de entrada, y se mantienen a lo sumo
+    dos bloques por proceso en curso, por lo que la entrada se consume de forma perezosa.
+    Si se provee un Rendimiento, se actualiza a medida que se retornan las lecturas.
+    """
+    workers = workers or cpu_count() or 1
+    bloques = _bloques(lecturas, chunksize)
+    if workers == 1:
+        resultados = (_procesar_bloque(inicio, bloque, modo) for inicio, bloque in bloques)
+    else:
+        resultados = _procesar_en_paralelo(bloques, workers, modo)
+    for resultado in resultados:
+        for lectura in resultado:
+            if rendimiento is not None:
+                rendimiento.lecturas += 1
+                if lectura.documento is None:
+                    rendimiento.rechazadas += 1
+                else:
+                    rendimiento.procesadas += 1
+            yield lectura
+    if rendimiento is not None:
+        rendimiento.fin = perf_counter()
+
+
+def _procesar_en_paralelo(bloques, workers, modo):
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pendientes = deque()
+        for inicio, bloque in bloques:
+            pendientes.append(executor.submit(_procesar_bloque, inicio, bloque, modo))
+            if len(pendientes) >= 2 * workers:
+                yield pendientes.popleft().result()
+        while pendientes:
+            yield pendientes.popleft().result()
+
+
+def lectura_a_json(lectura, **extra):
+    """
+    Retorna la Lectura como una línea JSON: número y atributos del documento, o número y motivo de rechazo.
+    Los campos de extra se agregan al objeto.
+    """
+    if lectura.documento is None:
+        campos = dict(extra, numero=lectura.numero, motivo=lectura.motivo.value)
+    else:
+        campos = dict(extra, numero=lectura.numero, **vars(lectura.documento))
+        campos["tipo_documento"] = campos["tipo_documento"].value
+    return json.dumps(campos, ensure_ascii=False)
+
+
+def main(argumentos=None):
+    parser = ArgumentParser(prog="python -m batch_reader", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("entrada", help="archivo de lecturas, una por línea ('-' para stdin)")
+    parser.add_argument("-o", "--salida", default="-", help="archivo JSON Lines de salida ('-' para stdout)")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="cantidad de procesos (por defecto, CPUs)")
+    parser.add_argument("-c", "--chunksize", type=int, default=CHUNKSIZE, help="lecturas por bloque")
+    parser.add_argument("-m", "--modo", choices=[modo.value for modo in ModoLectura], default=ModoLectura.REGEX.value)
+    argumentos = parser.parse_args(argumentos)
+
+    entrada = sys.stdin if argumentos.entrada == "-" else open(argumentos.entrada, encoding="utf-8")
+    salida = sys.stdout if argumentos.salida == "-" else open(argumentos.salida, "w", encoding="utf-8")
+    rendimiento = Rendimiento()
+    try:
+        for lectura in parse_batch(entrada, argumentos.workers, argumentos.chunksize, ModoLectura(argumentos.modo),
+                                   rendimiento):
+            salida.write(lectura_a_json(lectura) + "\n")
+    finally:
+        if entrada is not sys.stdin:
+            entrada.close()
+        if salida is not sys.stdout:
+            salida.close()
+    print(rendimiento, file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,534 @@
+# -*- coding: utf-8 -*-
+"""
+Mediciones de rendimiento de document_reader.
+
+    python benchmark_reader.py [variantes] [adversarial] [memoria] [incremental] [metricas] [orden] [exportacion]
+                               [captura] [indice] [validacion] [formatos] [hilos] [--cantidad N] [--lecturas N]
+
+variantes: lecturas por segundo y latencia (p50 y p99) por cada variante de scan_generator, en ambos modos de
+lectura, junto con el porcentaje de lecturas reconocidas con el tipo y teclado esperados.
+
+adversarial: cadenas corruptas que crecen en longitud, como las que envía un lector que falla y repite separadores
+o la misma lectura. En modo TOKENS el tiempo por caracter se mantiene plano; en modo REGEX crece con la longitud por
+el backtracking de los patrones.
+
+memoria: memoria ocupada por N lecturas procesadas (un millón por defecto) conservadas como Document y como
+DocumentRecord.
+
+incremental: lecturas tipeadas caracter por caracter en IncrementalParser, seguidas de un salto de línea. Informa el
+costo por caracter y cuántos caracteres antes del final de la línea se entrega cada lectura.
+
+metricas: lecturas por segundo de una mezcla de todas las variantes sin observadores y con Metricas instalado.
+
+orden: lecturas por segundo de tráficos sesgados hacia un tipo de documento, con el orden histórico de los formatos,
+con OrdenFormatos adaptativo y con el perfil del sitio.
+
+exportacion: documentos por segundo escritos como JSON Lines (con lectura_a_json de batch_reader y con
+escribir_jsonl) y como CSV, y memoria retenida por N documentos (cantidad) como diccionarios y en un LoteColumnar.
+
+captura: un archivo de captura temporal con una mezcla de todas las variantes (los carnets de conductor en 19
+líneas). Registros por segundo delimitados sobre el mmap y procesados con parse_capture con uno y con varios
+procesos.
+
+indice: documentos por segundo agregados a IndiceDocumentos, tamaño del snapshot por documento y segundos para
+volver a tener el índice al reiniciar: cargando el snapshot y procesando otra vez las lecturas.
+
+validacion: documentos por segundo de validar_lote sobre un LoteColumnar, documento por documento y vectorizado
+(si NumPy está instalado), y si ambos dan el mismo resultado.
+
+formatos: lecturas por segundo de una mezcla de todas las variantes con los formatos históricos y con dos formatos
+más registrados con registrar_formato (un pasaporte de dos líneas MRZ y una generación de DNI de prueba), en ambos
+modos de lectura.
+
+hilos: lecturas por segundo con 1, 4 y 16 hilos que procesan a la vez la misma mezcla de variantes recibida como bytes,
+creando un Document por llamada y con un DocumentParser compartido (sin y con cache y métricas), y si todos los hilos
+obtienen el resultado de procesar las lecturas en un solo hilo.
+"""
+import io
+import mmap
+import os
+import tempfile
+import tracemalloc
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+from random import Random
+from time import perf_counter, perf_counter_ns
+
+from batch_reader import lectura_a_json
+from capture_reader import _registros, parse_capture
+from document_cache import DocumentCache
+from document_export import LoteColumnar, escribir_csv, escribir_jsonl
+from document_index import IndiceDocumentos
+from document_metrics import Metricas
+from document_reader import (FECHA, LETRA, NOMBRE, CampoFormato, Document, DocumentParser, ModoLectura,
+                             OrdenFormatos, cifras, constante, empieza_con, registrar_formato)
+from document_validation import validar_lote
+from incremental_reader import IncrementalParser
+from scan_generator import VARIANTES, lecturas as lecturas_sinteticas
+
+LECTURA_GEN_UNO_ES = "@A@1@VIVAS@ELIANA@ARGENTINA@07/04/1976@F@07/04/2010"
+
+ADVERSARIALES = {
+    "Separadores repetidos": lambda n: "\"" * n,
+    "Separadores y fecha": lambda n: "@" * n + "01/01/2000",
+    "Campos gen. 1 repetidos": lambda n: "\"A\"1\"" * n + "-",
+    "Nombre extenso": lambda n: "A\"" + "AB " * n + "\"B\"-",
+    "Lectura repetida": lambda n: LECTURA_GEN_UNO_ES * n,
+}
+
+REPETICIONES_ADVERSARIALES = (25, 50, 100, 200)
+
+
+def medir(funcion, *args):
+    """Retorna el tiempo en segundos de una llamada"""
+    inicio = perf_counter()
+    funcion(*args)
+    return perf_counter() - inicio
+
+
+def percentil(valores_ordenados, porcentaje):
+    return valores_ordenados[min(len(valores_ordenados) - 1, int(len(valores_ordenados) * porcentaje / 100.0))]
+
+
+def benchmark_variantes(lecturas=2000, modos=(ModoLectura.REGEX, ModoLectura.TOKENS), semilla=0):
+    """
+    Retorna {(variante, modo): (lecturas por segundo, p50 en microsegundos, p99 en microsegundos, % reconocidas)}
+    """
+    resultados = {}
+    for variante, (generar, tipo_documento, teclado) in VARIANTES.items():
+        rnd = Random(semilla)
+        muestras = [generar(rnd) for _ in range(lecturas)]
+        for modo in modos:
+            tiempos = []
+            reconocidas = 0
+            for muestra in muestras:
+                inicio = perf_counter_ns()
+                documento = Document(muestra, modo)
+                tiempos.append(perf_counter_ns() - inicio)
+                reconocidas += documento.tipo_documento is tipo_documento and documento.teclado == teclado
+            tiempos.sort()
+            resultados[(variante, modo)] = (lecturas * 1e9 / sum(tiempos), percentil(tiempos, 50) / 1e3,
+                                            percentil(tiempos, 99) / 1e3, 100.0 * reconocidas / lecturas)
+    return resultados
+
+
+def imprimir_variantes(resultados):
+    print("%-24s %-6s %12s %10s %10s %11s" % ("Variante", "Modo", "Lecturas/s", "p50 (us)", "p99 (us)",
+                                              "Reconocidas"))
+    for (variante, modo), (por_segundo, p50, p99, reconocidas) in resultados.items():
+        print("%-24s %-6s %12.0f %10.1f %10.1f %10.1f%%" % (variante, modo.value, por_segundo, p50, p99, reconocidas))
+
+
+def benchmark_adversarial(modos=(ModoLectura.TOKENS, ModoLectura.REGEX), repeticiones=REPETICIONES_ADVERSARIALES):
+    """
+    Retorna {(nombre, modo): [(longitud, microsegundos por caracter), ...]} para cada lectura adversarial
+    """
+    resultados = {}
+    for nombre, generar in ADVERSARIALES.items():
+        for modo in modos:
+            tiempos = resultados[(nombre, modo)] = []
+            for n in repeticiones:
+                muestra = generar(n)
+                tiempos.append((len(muestra), medir(Document, muestra, modo) * 1e6 / len(muestra)))
+    return resultados
+
+
+def imprimir_adversarial(resultados):
+    print("Lecturas adversariales (microsegundos por caracter)")
+    for (nombre, modo), tiempos in resultados.items():
+        print("  %-25s %-6s %s" % (nombre, modo.value,
+                                    "  ".join("%6d: %7.3f" % (longitud, tiempo) for longitud, tiempo in tiempos)))
+
+
+def _fecha(dias):
+    return "%02d/%02d/%04d" % (dias % 28 + 1, dias // 28 % 12 + 1, 1940 + dias // 336)
+
+
+def _lecturas_memoria(cantidad):
+    for i in range(cantidad):
+        # Fechas de nacimiento a lo largo de 70 años y de emisión a lo largo de 10, como en un lote real
+        nacimiento, emision = _fecha(i * 7919 % 23520), _fecha(20160 + i * 104729 % 3360)
+        if i % 2:
+            yield "%011d@HERRMANN@LUCAS EMILIO@M@%08d@A@%s@%s" % (i, 20000000 + i, nacimiento, emision)
+        else:
+            yield ("@%08d    @A@1@VIVAS@ELIANA GUILLERMINA@ARGENTINA@%s@F@%s@%011d@2128@1490@"
+                   "ILR:01.11 C:100328.01@UNIDAD ·12 || S/N: 0040>2008>>0014" % (20000000 + i, nacimiento, emision, i))
+
+
+def benchmark_memoria(cantidad=1000000):
+    """
+    Retorna {nombre: bytes} con la memoria retenida por cantidad lecturas procesadas, según cómo se conservan
+    """
+    conversiones = {"Document": lambda documento: documento,
+                    "DocumentRecord": Document.to_record}
+    resultados = {}
+    for nombre, convertir in conversiones.items():
+        tracemalloc.start()
+        lote = [convertir(Document(lectura)) for lectura in _lecturas_memoria(cantidad)]
+        resultados[nombre] = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del lote
+    return resultados
+
+
+def imprimir_memoria(resultados, cantidad):
+    print("Memoria retenida por %d lecturas procesadas" % cantidad)
+    base = resultados["Document"]
+    for nombre, memoria in resultados.items():
+        print("  %-15s %8.1f MB  %5.1f bytes/lectura  %5.1f%%" % (nombre, memoria / 2 ** 20, memoria / cantidad,
+                                                                   100.0 * memoria / base))
+
+
+def benchmark_incremental(lecturas=2000, semilla=0):
+    """
+    Retorna {variante: (microsegundos por caracter, caracteres restantes promedio al entregar la lectura)}
+    """
+    resultados = {}
+    for variante, (generar, _, _) in VARIANTES.items():
+        rnd = Random(semilla)
+        muestras = [generar(rnd) + "\n" for _ in range(lecturas)]
+        parser = IncrementalParser(espera=None)
+        restantes = 0
+        inicio = perf_counter()
+        for muestra in muestras:
+            for posicion, caracter in enumerate(muestra):
+                if parser.feed(caracter):
+                    restantes += len(muestra) - posicion - 1
+        resultados[variante] = ((perf_counter() - inicio) * 1e6 / sum(map(len, muestras)), restantes / lecturas)
+    return resultados
+
+
+def imprimir_incremental(resultados):
+    print("%-24s %12s %10s" % ("Variante", "us/caracter", "Restantes"))
+    for variante, (por_caracter, restantes) in resultados.items():
+        print("%-24s %12.2f %10.1f" % (variante, por_caracter, restantes))
+
+
+def benchmark_metricas(lecturas=20000, repeticiones=5):
+    """
+    Retorna {nombre: lecturas por segundo} procesando la misma mezcla de variantes sin y con métricas (el mejor de
+    repeticiones)
+    """
+    muestras = [lectura for _, lectura in lecturas_sinteticas(lecturas)]
+    resultados = {}
+    for nombre in ("Sin observadores", "Con Metricas"):
+        metricas = Metricas().instalar() if nombre == "Con Metricas" else None
+        try:
+            segundos = min(medir(lambda: [Document(muestra) for muestra in muestras]) for _ in range(repeticiones))
+        finally:
+            if metricas is not None:
+                metricas.desinstalar()
+        resultados[nombre] = lecturas / segundos
+    return resultados
+
+
+def imprimir_metricas(resultados):
+    print("Costo de las métricas (lecturas por segundo)")
+    base = resultados["Sin observadores"]
+    for nombre, por_segundo in resultados.items():
+        print("  %-18s %10.0f  %6.1f%%" % (nombre, por_segundo, 100.0 * por_segundo / base))
+
+
+def benchmark_exportacion(lecturas=20000, cantidad=200000):
+    """
+    Retorna ({salida: documentos por segundo}, {conservación: bytes retenidos por cantidad documentos})
+    """
+    procesadas = list(Document.parse_many(_lecturas_memoria(lecturas), rechazos=False))
+    documentos = [lectura.documento for lectura in procesadas]
+    salidas = {"lectura_a_json": lambda: io.StringIO().writelines(lectura_a_json(lectura) + "\n"
+                                                                  for lectura in procesadas),
+               "escribir_jsonl": lambda: escribir_jsonl(documentos, io.StringIO()),
+               "escribir_csv": lambda: escribir_csv(documentos, io.StringIO(newline=""))}
+    velocidades = dict((nombre, lecturas / min(medir(escribir) for _ in range(3)))
+                       for nombre, escribir in salidas.items())
+    conversiones = {"Diccionarios": lambda lecturas: [lectura.documento.to_dict() for lectura in lecturas],
+                    "LoteColumnar": lambda lecturas: LoteColumnar(lectura.documento for lectura in lecturas)}
+    memoria = {}
+    for nombre, convertir in conversiones.items():
+        tracemalloc.start()
+        lote = convertir(Document.parse_many(_lecturas_memoria(cantidad), rechazos=False))
+        memoria[nombre] = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del lote
+    return velocidades, memoria
+
+
+def imprimir_exportacion(resultados, cantidad):
+    velocidades, memoria = resultados
+    print("Exportación (documentos por segundo)")
+    for nombre, por_segundo in velocidades.items():
+        print("  %-18s %10.0f" % (nombre, por_segundo))
+    print("Memoria retenida por %d documentos" % cantidad)
+    for nombre, bytes_retenidos in memoria.items():
+        print("  %-18s %8.1f MB  %6.1f bytes/documento" % (nombre, bytes_retenidos / 2 ** 20,
+                                                             bytes_retenidos / cantidad))
+
+
+"""
+Tráficos sesgados: nombre -> (variantes dominantes con el 90% de las lecturas, perfil del sitio)
+"""
+TRAFICOS_SESGADOS = {
+    "90% DNI gen. 3 ES": (("gen_tres_es",), ("dni_gen_tres",)),
+    "90% DNI gen. 1": (("gen_uno_es", "gen_uno_us"), ("dni_gen_uno", "dni_gen_uno_soft")),
+    "90% DNI gen. 1 soft": (("gen_uno_soft_es", "gen_uno_soft_us"), ("dni_gen_uno_soft",)),
+    "90% DNI gen. 2": (("gen_dos_es", "gen_dos_us"), ("dni_gen_dos",)),
+}
+
+
+def _trafico_sesgado(dominantes, lecturas, semilla=0):
+    rnd = Random(semilla)
+    resto = [variante for variante in VARIANTES if variante not in dominantes]
+    return [VARIANTES[rnd.choice(dominantes if rnd.random() < 0.9 else resto)][0](rnd) for _ in range(lecturas)]
+
+
+def benchmark_orden(lecturas=20000, modos=(ModoLectura.REGEX, ModoLectura.TOKENS), repeticiones=3):
+    """
+    Retorna {(tráfico, modo): {orden: lecturas por segundo}} para el orden histórico, un OrdenFormatos adaptativo
+    (medido luego de procesar el tráfico una vez) y el perfil del sitio
+    """
+    resultados = {}
+    for nombre, (dominantes, perfil) in TRAFICOS_SESGADOS.items():
+        muestras = _trafico_sesgado(dominantes, lecturas)
+        for modo in modos:
+            adaptativo = OrdenFormatos()
+            for muestra in muestras:
+                Document(muestra, modo, adaptativo)
+            ordenes = {"Histórico": None, "Adaptativo": adaptativo, "Perfil": OrdenFormatos(perfil)}
+            resultados[(nombre, modo)] = {
+                etiqueta: lecturas / min(medir(lambda: [Document(muestra, modo, orden) for muestra in muestras])
+                                         for _ in range(repeticiones))
+                for etiqueta, orden in ordenes.items()}
+    return resultados
+
+
+def imprimir_orden(resultados):
+    print("%-22s %-6s %12s %13s %13s" % ("Tráfico", "Modo", "Histórico", "Adaptativo", "Perfil"))
+    for (nombre, modo), por_orden in resultados.items():
+        base = por_orden["Histórico"]
+        print("%-22s %-6s %12.0f %7.0f %+4.0f%% %7.0f %+4.0f%%" % (
+            nombre, modo.value, base, por_orden["Adaptativo"], 100.0 * por_orden["Adaptativo"] / base - 100,
+            por_orden["Perfil"], 100.0 * por_orden["Perfil"] / base - 100))
+
+
+def benchmark_captura(lecturas=20000, workers=None):
+    """
+    Retorna {medición: registros por segundo} de un archivo de captura con lecturas registros
+    """
+    workers = workers or max(2, os.cpu_count() or 1)
+    descriptor, ruta = tempfile.mkstemp(suffix=".log")
+    try:
+        with os.fdopen(descriptor, "w", encoding="utf-8") as archivo:
+            for _, lectura in lecturas_sinteticas(lecturas, semilla=1):
+                archivo.write(lectura.strip("\r\n") + "\n")
+
+        def delimitar():
+            with open(ruta, "rb") as archivo, mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+                return sum(1 for _ in _registros(mapa, 0, len(mapa), False))
+
+        registros = delimitar()
+        mediciones = {"Delimitación (mmap)": delimitar,
+                      "parse_capture, 1 proceso": lambda: sum(1 for _ in parse_capture(ruta)),
+                      "parse_capture, %d procesos" % workers: lambda: sum(1 for _ in parse_capture(
+                          ruta, workers=workers, tamano_rango=os.path.getsize(ruta) // (4 * workers) + 1))}
+        return dict((nombre, registros / min(medir(funcion) for _ in range(3)))
+                    for nombre, funcion in mediciones.items())
+    finally:
+        os.remove(ruta)
+
+
+def imprimir_captura(resultados):
+    print("Archivo de captura (registros por segundo)")
+    for nombre, por_segundo in resultados.items():
+        print("  %-28s %10.0f" % (nombre, por_segundo))
+
+
+def benchmark_indice(cantidad=200000):
+    """
+    Retorna (documentos agregados por segundo, bytes del snapshot por documento, segundos hasta buscar en el índice
+    cargando el snapshot, segundos hasta buscar en el índice procesando otra vez las lecturas)
+    """
+    documentos = [lectura.documento for lectura in Document.parse_many(_lecturas_memoria(cantidad), rechazos=False)]
+    indice = IndiceDocumentos()
+    agregados = len(documentos) / medir(lambda: [indice.agregar(documento) for documento in documentos])
+    descriptor, ruta = tempfile.mkstemp(suffix=".idx")
+    os.close(descriptor)
+    try:
+        indice.guardar(ruta)
+        tamano = os.path.getsize(ruta) / len(indice)
+        dni = documentos[-1].dni
+        carga = medir(lambda: IndiceDocumentos.cargar(ruta).buscar_dni(dni))
+
+        def reprocesar():
+            nuevo = IndiceDocumentos()
+            for lectura in Document.parse_many(_lecturas_memoria(cantidad), rechazos=False):
+                nuevo.agregar(lectura.documento)
+            return nuevo.buscar_dni(dni)
+
+        return agregados, tamano, carga, medir(reprocesar)
+    finally:
+        os.remove(ruta)
+
+
+def imprimir_indice(resultados, cantidad):
+    agregados, tamano, carga, reproceso = resultados
+    print("Índice de %d documentos" % cantidad)
+    print("  %-28s %10.0f" % ("Documentos agregados por s", agregados))
+    print("  %-28s %10.1f" % ("Bytes de snapshot/documento", tamano))
+    print("  %-28s %10.4f s" % ("Cargar snapshot", carga))
+    print("  %-28s %10.4f s" % ("Procesar otra vez", reproceso))
+
+
+def benchmark_validacion(cantidad=200000):
+    """
+    Retorna ({camino: documentos por segundo}, si todos los caminos dan el mismo resultado)
+    """
+    lote = LoteColumnar(lectura.documento for lectura in Document.parse_many(_lecturas_memoria(cantidad),
+                                                                             rechazos=False))
+    caminos = {"Documento por documento": False}
+    try:
+        import numpy  # noqa: F401
+        caminos["Vectorizado (NumPy)"] = True
+    except ImportError:
+        pass
+    velocidades = {}
+    resultados = []
+    for nombre, vectorizado in caminos.items():
+        velocidades[nombre] = len(lote) / min(medir(validar_lote, lote, None, vectorizado) for _ in range(3))
+        resultados.append(validar_lote(lote, vectorizado=vectorizado))
+    return velocidades, all(resultado == resultados[0] for resultado in resultados)
+
+
+def imprimir_validacion(resultados):
+    velocidades, iguales = resultados
+    print("Validación de lotes (documentos por segundo)")
+    for nombre, por_segundo in velocidades.items():
+        print("  %-28s %10.0f" % (nombre, por_segundo))
+    print("  Resultados idénticos: %s" % ("sí" if iguales else "NO"))
+
+
+class _TipoPrueba(Enum):
+    PASAPORTE = "Pasaporte"
+    DNI_GEN_4 = "DNI generación de prueba"
+
+
+def _registrar_formatos_prueba():
+    registrar_formato("pasaporte_mrz", _TipoPrueba.PASAPORTE, "\n",
+                      (CampoFormato(tipo=empieza_con("P<ARG")), CampoFormato()))
+    registrar_formato("dni_gen_prueba", _TipoPrueba.DNI_GEN_4, "@",
+                      (CampoFormato(tipo=constante("AR4")), CampoFormato("dni", cifras(7, 8), opcional=True),
+                       CampoFormato("apellidos", NOMBRE), CampoFormato("nombres", NOMBRE), CampoFormato("sexo", LETRA),
+                       CampoFormato("fecha_nacimiento", FECHA)),
+                      fecha="/")
+
+
+def benchmark_formatos(lecturas=20000, modos=(ModoLectura.REGEX, ModoLectura.TOKENS), repeticiones=5):
+    """
+    Retorna {(modo, formatos): lecturas por segundo} de la misma mezcla de variantes con los formatos históricos y con
+    los formatos de prueba registrados (el mejor de repeticiones)
+    """
+    muestras = [lectura for _, lectura in lecturas_sinteticas(lecturas)]
+    historicos, posiciones = Document._formatos, Document._posiciones
+    resultados = {}
+    try:
+        for formatos in ("Históricos", "Con 3 registrados"):
+            if formatos != "Históricos":
+                _registrar_formatos_prueba()
+            for modo in modos:
+                segundos = min(medir(lambda: [Document(muestra, modo) for muestra in muestras])
+                               for _ in range(repeticiones))
+                resultados[(modo, formatos)] = lecturas / segundos
+    finally:
+        Document._formatos, Document._posiciones = historicos, posiciones
+    return resultados
+
+
+def imprimir_formatos(resultados):
+    print("Formatos registrados (lecturas por segundo)")
+    for (modo, formatos), por_segundo in resultados.items():
+        base = resultados[(modo, "Históricos")]
+        print("  %-6s %-18s %10.0f  %6.1f%%" % (modo.value, formatos, por_segundo, 100.0 * por_segundo / base))
+
+
+HILOS = (1, 4, 16)
+
+
+def benchmark_hilos(lecturas=20000, hilos=HILOS, repeticiones=3):
+    """
+    Retorna ({(forma, hilos): lecturas por segundo}, si todos los resultados son los de un solo hilo). En cada
+    repetición se crea un procesador que comparten todos los hilos, y cada hilo procesa su parte de las lecturas.
+    Las formas se alternan en cada repetición y se toma la mejor
+    """
+    datos = [lectura.encode("utf-8") for _, lectura in lecturas_sinteticas(lecturas)]
+    esperados = [Document(dato.decode("utf-8")).to_record() for dato in datos]
+    formas = {
+        "Document por llamada": lambda: lambda dato: Document(dato.decode("utf-8")),
+        "DocumentParser": lambda: DocumentParser().parse,
+        "Con cache y métricas": lambda: DocumentParser(cache=DocumentCache(), metricas=Metricas()).parse,
+    }
+    velocidades = dict.fromkeys(((forma, cantidad) for forma in formas for cantidad in hilos), 0)
+    iguales = True
+    for cantidad in hilos:
+        partes = [datos[numero::cantidad] for numero in range(cantidad)]
+        for _ in range(repeticiones):
+            for forma, crear in formas.items():
+                procesar = crear()
+                with ThreadPoolExecutor(max_workers=cantidad) as executor:
+                    inicio = perf_counter()
+                    resultados = list(executor.map(lambda parte: [procesar(dato) for dato in parte], partes))
+                    por_segundo = lecturas / (perf_counter() - inicio)
+                velocidades[(forma, cantidad)] = max(velocidades[(forma, cantidad)], por_segundo)
+                for numero, resultado in enumerate(resultados):
+                    registros = [documento.to_record() if isinstance(documento, Document) else documento
+                                 for documento in resultado]
+                    iguales = iguales and registros == esperados[numero::cantidad]
+    return velocidades, iguales
+
+
+def imprimir_hilos(resultados):
+    velocidades, iguales = resultados
+    print("Lecturas por segundo por cantidad de hilos")
+    print("  %-22s" % "Hilos" + "".join("%12d" % cantidad for cantidad in HILOS))
+    for forma in dict.fromkeys(forma for forma, _ in velocidades):
+        print("  %-22s" % forma + "".join("%12.0f" % velocidades[(forma, cantidad)] for cantidad in HILOS))
+    print("  Resultados idénticos: %s" % ("sí" if iguales else "NO"))
+
+
+SECCIONES = ("variantes", "adversarial", "memoria", "incremental", "metricas", "orden", "exportacion", "captura",
+             "indice", "validacion", "formatos", "hilos")
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Mediciones de rendimiento de document_reader")
+    parser.add_argument("secciones", nargs="*", metavar="SECCION",
+                        help="secciones a medir: %s (por defecto, todas)" % ", ".join(SECCIONES))
+    parser.add_argument("--lecturas", type=int, default=2000, help="lecturas por variante")
+    parser.add_argument("--cantidad", type=int, default=1000000, help="lecturas de la medición de memoria")
+    argumentos = parser.parse_args()
+    argumentos.secciones = argumentos.secciones or SECCIONES
+    if not set(argumentos.secciones) <= set(SECCIONES):
+        parser.error("secciones válidas: " + ", ".join(SECCIONES))
+    if "variantes" in argumentos.secciones:
+        imprimir_variantes(benchmark_variantes(argumentos.lecturas))
+    if "adversarial" in argumentos.secciones:
+        imprimir_adversarial(benchmark_adversarial())
+    if "memoria" in argumentos.secciones:
+        imprimir_memoria(benchmark_memoria(argumentos.cantidad), argumentos.cantidad)
+    if "incremental" in argumentos.secciones:
+        imprimir_incremental(benchmark_incremental(argumentos.lecturas))
+    if "metricas" in argumentos.secciones:
+        imprimir_metricas(benchmark_metricas(10 * argumentos.lecturas))
+    if "orden" in argumentos.secciones:
+        imprimir_orden(benchmark_orden(10 * argumentos.lecturas))
+    if "exportacion" in argumentos.secciones:
+        imprimir_exportacion(benchmark_exportacion(10 * argumentos.lecturas, argumentos.cantidad),
+                             argumentos.cantidad)
+    if "captura" in argumentos.secciones:
+        imprimir_captura(benchmark_captura(10 * argumentos.lecturas))
+    if "indice" in argumentos.secciones:
+        imprimir_indice(benchmark_indice(argumentos.cantidad), argumentos.cantidad)
+    if "validacion" in argumentos.secciones:
+        imprimir_validacion(benchmark_validacion(argumentos.cantidad))
+    if "formatos" in argumentos.secciones:
+        imprimir_formatos(benchmark_formatos(10 * argumentos.lecturas))
+    if "hilos" in argumentos.secciones:
+        imprimir_hilos(benchmark_hilos(10 * argumentos.lecturas))
@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""
+Procesamiento de archivos de captura de los lectores, de varios GB, mapeados en memoria.
+
+    python -m capture_reader captura.log -o documentos.jsonl --workers 8 --desde 0
+
+Los lectores agregan cada lectura al archivo tal como la reciben: los DNI ocupan una línea y el carnet de conductor
+un bloque de 19 líneas que empieza con la línea 'DNI' (algunas de sus líneas pueden estar vacías). Las líneas vacías
+fuera de un bloque se ignoran. Un bloque interrumpido por otra línea 'DNI' o por una línea con separadores de
+campos ('@' o '"', que ninguna línea del carnet tiene) termina ahí, y esa línea inicia el registro siguiente.
+
+El archivo no se lee completo: se recorre con mmap y sólo se copia cada registro al procesarlo. Cada resultado
+informa los desplazamientos en bytes del registro; el fin del último registro procesado es el punto desde donde
+retomar tras una interrupción (--desde). El último registro del archivo, si está incompleto (sin su salto de línea
+final, o un carnet con menos de 19 líneas), se considera todavía en escritura y no se procesa, salvo con
+--parciales.
+"""
+import mmap
+import sys
+from argparse import ArgumentParser
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from os import cpu_count
+from time import perf_counter
+
+from batch_reader import Rendimiento, lectura_a_json
+from document_reader import LINEAS_CONDUCTOR, SEPARADORES_LINEA, Document, ModoLectura
+
+# Bytes de archivo por cada rango que procesa un proceso
+TAMANO_RANGO = 8 * 2 ** 20
+
+"""
+Resultado de parse_capture: desplazamiento en bytes del inicio del registro y del byte siguiente a su fin, y la
+Lectura procesada (ver Document.parse_many)
+"""
+RegistroCaptura = namedtuple("RegistroCaptura", ("inicio", "fin", "lectura"))
+
+
+def _es_dni(mapa, inicio, fin):
+    """Indica si la línea entre inicio y fin (sin el salto de línea) es 'DNI'"""
+    return fin - inicio in (3, 4) and mapa[inicio:fin].rstrip(b"\r") == b"DNI"
+
+
+_SEPARADORES_LINEA = tuple(separador.encode() for separador in SEPARADORES_LINEA)
+
+
+def _termina_carnet(mapa, inicio, fin):
+    """
+    Indica si la línea entre inicio y fin no continúa un carnet de conductor: es otra línea 'DNI' o tiene
+    SEPARADORES_LINEA, y empieza otro registro
+    """
+    return _es_dni(mapa, inicio, fin) or any(mapa.find(separador, inicio, fin) >= 0 for separador in _SEPARADORES_LINEA)
+
+
+def _registros(mapa, desde, hasta, parciales):
+    """
+    Generador de (inicio, fin, contenido en bytes) de los registros que empiezan entre desde (inicio de un registro)
+    y hasta. El último puede terminar después de hasta
+    """
+    tamano = len(mapa)
+    posicion = desde
+    while posicion < hasta:
+        fin_linea = mapa.find(b"\n", posicion)
+        if fin_linea < 0:
+            if parciales and mapa[posicion:tamano].strip():
+                yield posicion, tamano, mapa[posicion:tamano].rstrip(b"\r")
+            return
+        if _es_dni(mapa, posicion, fin_linea):
+            lineas = [b"DNI"]
+            siguiente = fin_linea + 1
+            while len(lineas) < LINEAS_CONDUCTOR:
+                fin_linea = mapa.find(b"\n", siguiente)
+                if fin_linea < 0:
+                    if siguiente < tamano and _termina_carnet(mapa, siguiente, tamano):
+                        break
+                    if not parciales:
+                        return
+                    if siguiente < tamano:
+                        lineas.append(mapa[siguiente:tamano].rstrip(b"\r"))
+                        siguiente = tamano
+                    break
+                if _termina_carnet(mapa, siguiente, fin_linea):
+                    break
+                lineas.append(mapa[siguiente:fin_linea].rstrip(b"\r"))
+                siguiente = fin_linea + 1
+            yield posicion, siguiente, b"\n".join(lineas)
+            posicion = siguiente
+        else:
+            linea = mapa[posicion:fin_linea].rstrip(b"\r")
+            if linea.strip():
+                yield posicion, fin_linea + 1, linea
+            posicion = fin_linea + 1
+
+
+def _alinear(mapa, posicion):
+    """
+    Retorna el inicio del primer registro que empieza en posicion o después, el mismo límite que encontraría un
+    recorrido del archivo desde el principio. Si posicion cae dentro de un carnet de conductor (hay una línea
+    'DNI' entre las 18 líneas anteriores, sin una línea que lo termine en el medio, ver _termina_carnet), el registro
+    siguiente empieza al terminar el carnet
+    """
+    tamano = len(mapa)
+    if posicion <= 0:
+        return 0
+    if posicion >= tamano:
+        return tamano
+    if mapa[posicion - 1] != ord("\n"):
+        fin_linea = mapa.find(b"\n", posicion)
+        if fin_linea < 0:
+            return tamano
+        posicion = fin_linea + 1
+    inicio_linea = posicion
+    for distancia in range(1, LINEAS_CONDUCTOR):
+        if inicio_linea == 0:
+            break
+        anterior = mapa.rfind(b"\n", 0, inicio_linea - 1) + 1
+        if _es_dni(mapa, anterior, inicio_linea - 1):
+            # posicion es la línea distancia del carnet: se saltan las que faltan, salvo que empiece otro registro
+            for _ in range(LINEAS_CONDUCTOR - distancia):
+                fin_linea = mapa.find(b"\n", posicion)
+                if fin_linea < 0:
+                    return posicion if _termina_carnet(mapa, posicion, tamano) else tamano
+                if _termina_carnet(mapa, posicion, fin_linea):
+                    break
+                posicion = fin_linea + 1
+            return posicion
+        if _termina_carnet(mapa, anterior, inicio_linea - 1):
+            # Un carnet anterior terminó antes de esta línea, que es de un documento de una línea
+            break
+        inicio_linea = anterior
+    return posicion
+
+
+def _procesar_rango(ruta, desde, hasta, alinear, parciales, modo):
+    """
+    Procesa los registros que empiezan entre desde y hasta. Con alinear, ambos límites se llevan al inicio de un
+    registro. Retorna la lista de RegistroCaptura, numerados desde 1
+    """
+    with open(ruta, "rb") as archivo, mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+        if alinear:
+            desde, hasta = _alinear(mapa, desde), _alinear(mapa, hasta)
+        registros = list(_registros(mapa, desde, hasta, parciales))
+    lecturas = Document.parse_many((contenido.decode("utf-8", errors="replace") for _, _, contenido in registros),
+                                   modo)
+    return [RegistroCaptura(inicio, fin, lectura) for (inicio, fin, _), lectura in zip(registros, lecturas)]
+
+
+def parse_capture(ruta, desde=0, workers=1, modo=ModoLectura.REGEX, parciales=False, tamano_rango=TAMANO_RANGO):
+    """
+    Generador de RegistroCaptura, en el orden del archivo, de los registros que empiezan desde el desplazamiento
+    desde (el fin de un registro ya procesado, o 0). Con más de un worker, el archivo se reparte en rangos de
+    tamano_rango bytes entre procesos, cada uno alineado al inicio de un registro, manteniendo a lo sumo dos rangos
+    por proceso en curso. Las lecturas se numeran desde 1 en cada llamada
+    """
+    with open(ruta, "rb") as archivo:
+        archivo.seek(0, 2)
+        tamano = archivo.tell()
+    if tamano == 0 or desde >= tamano:
+        return
+    limites = list(range(desde, tamano, tamano_rango)) + [tamano]
+    # Sólo el rango donde empieza el último registro del archivo llega al fin del archivo, aunque no sea el último
+    rangos = [(ruta, inicio, fin, inicio != desde, parciales, modo)
+              for inicio, fin in zip(limites, limites[1:])]
+    if workers == 1:
+        resultados = (_procesar_rango(*rango) for rango in rangos)
+    else:
+        resultados = _procesar_en_paralelo(rangos, workers or cpu_count() or 1)
+    numero = 0
+    for resultado in resultados:
+        for registro in resultado:
+            numero += 1
+            yield registro._replace(lectura=registro.lectura._replace(numero=numero))
+
+
+def _procesar_en_paralelo(rangos, workers):
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pendientes = deque()
+        for rango in rangos:
+            pendientes.append(executor.submit(_procesar_rango, *rango))
+            if len(pendientes) >= 2 * workers:
+                yield pendientes.popleft().result()
+        while pendientes:
+            yield pendientes.popleft().result()
+
+
+def main(argumentos=None):
+    parser = ArgumentParser(prog="python -m capture_reader", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("captura", help="archivo de captura de los lectores")
+    parser.add_argument("-o", "--salida", default="-", help="archivo JSON Lines de salida ('-' para stdout)")
+    parser.add_argument("-d", "--desde", type=int, default=0, help="desplazamiento en bytes desde donde retomar")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="cantidad de procesos (por defecto, CPUs)")
+    parser.add_argument("-m", "--modo", choices=[modo.value for modo in ModoLectura], default=ModoLectura.REGEX.value)
+    parser.add_argument("--parciales", action="store_true",
+                        help="procesar también el último registro aunque esté incompleto")
+    argumentos = parser.parse_args(argumentos)
+
+    salida = sys.stdout if argumentos.salida == "-" else open(argumentos.salida, "a", encoding="utf-8")
+    rendimiento = Rendimiento()
+    siguiente = argumentos.desde
+    try:
+        for registro in parse_capture(argumentos.captura, argumentos.desde, argumentos.workers,
+                                      ModoLectura(argumentos.modo), argumentos.parciales):
+            salida.write(lectura_a_json(registro.lectura, inicio=registro.inicio, fin=registro.fin) + "\n")
+            siguiente = registro.fin
+            rendimiento.lecturas += 1
+            if registro.lectura.documento is None:
+                rendimiento.rechazadas += 1
+            else:
+                rendimiento.procesadas += 1
+    finally:
+        if salida is not sys.stdout:
+            salida.close()
+        rendimiento.fin = perf_counter()
+        print(rendimiento, file=sys.stderr)
+        print("Retomar con --desde %d" % siguiente, file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
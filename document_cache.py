@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+Cache de resultados para lecturas repetidas: en los accesos la misma tarjeta suele leerse varias veces en pocos
+segundos (reintentos, doble disparo del lector), y cada lectura repetida vuelve a recorrer todos los formatos.
+"""
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+
+from document_reader import Document, ModoLectura, normalizar
+
+
+class DocumentCache(object):
+    """
+    Cache LRU acotada, con vencimiento opcional, delante del procesamiento de lecturas. La clave es la lectura
+    normalizada, y el resultado un DocumentRecord inmutable, que puede compartirse sin copias (las lecturas
+    rechazadas también se guardan, con tipo_documento en None).
+
+        maximo: cantidad de lecturas guardadas; al superarla se desaloja la usada hace más tiempo
+        ttl: segundos de validez de cada resultado (None, sin vencimiento)
+        habilitada: con False no se guarda ninguna lectura, para instalaciones donde no deben retenerse datos
+            personales en memoria; los contadores de fallos siguen registrándose
+        modo: ModoLectura con el que se procesan las lecturas
+
+    Es segura para compartir entre hilos. El procesamiento ocurre fuera del lock, por lo que dos hilos que leen
+    a la vez la misma lectura nueva pueden procesarla ambos; el resultado es el mismo.
+    """
+
+    def __init__(self, maximo=1024, ttl=None, habilitada=True, modo=ModoLectura.REGEX, reloj=monotonic):
+        self.maximo = maximo
+        self.ttl = ttl
+        self.habilitada = habilitada
+        self.modo = modo
+        self._reloj = reloj
+        self._lock = Lock()
+        self._resultados = OrderedDict()
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+        self.vencimientos = 0
+
+    def leer(self, input_string, procesar=None):
+        """
+        Retorna el DocumentRecord de la lectura, procesándola sólo si no está en la cache. procesar(muestra) retorna
+        el DocumentRecord de la lectura normalizada (por defecto, la procesa Document con modo); una misma cache
+        debe usarse siempre con el mismo procesar
+        """
+        muestra = normalizar(input_string)
+        if self.habilitada:
+            ahora = self._reloj()
+            with self._lock:
+                guardado = self._resultados.get(muestra)
+                if guardado is not None:
+                    registro, vence = guardado
+                    if vence is None or vence > ahora:
+                        self._resultados.move_to_end(muestra)
+                        self.aciertos += 1
+                        return registro
+                    del self._resultados[muestra]
+                    self.vencimientos += 1
+                self.fallos += 1
+        else:
+            with self._lock:
+                self.fallos += 1
+        registro = Document(muestra, self.modo).to_record() if procesar is None else procesar(muestra)
+        if self.habilitada:
+            vence = None if self.ttl is None else self._reloj() + self.ttl
+            with self._lock:
+                self._resultados[muestra] = (registro, vence)
+                self._resultados.move_to_end(muestra)
+                while len(self._resultados) > self.maximo:
+                    self._resultados.popitem(last=False)
+                    self.desalojos += 1
+        return registro
+
+    def limpiar(self):
+        """Descarta todos los resultados guardados, conservando los contadores"""
+        with self._lock:
+            self._resultados.clear()
+
+    def __len__(self):
+        return len(self._resultados)
+
+    def estadisticas(self):
+        """Retorna los contadores y el tamaño actual como diccionario"""
+        with self._lock:
+            return {"aciertos": self.aciertos, "fallos": self.fallos, "desalojos": self.desalojos,
+                    "vencimientos": self.vencimientos, "guardadas": len(self._resultados)}
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+Exportación masiva de documentos procesados: JSON Lines y CSV escritos a medida que se procesan las lecturas, y
+un lote columnar, con una lista por campo, exportable a NumPy o Arrow si están instalados.
+
+    from document_export import LoteColumnar, escribir_csv
+    from document_reader import iter_documents
+
+    with open("documentos.csv", "w", encoding="utf-8", newline="") as salida:
+        escribir_csv((lectura.documento for lectura in iter_documents(lecturas)), salida)
+
+    lote = LoteColumnar(lectura.documento for lectura in iter_documents(lecturas))
+    tabla = lote.a_arrow()
+
+Todas las funciones reciben Document o DocumentRecord indistintamente y omiten los None (lecturas rechazadas).
+Los campos que el formato leído no informa quedan vacíos (null en JSON y Arrow), y tipo_documento se escribe como
+su texto y reparaciones como los nombres de las reparaciones aplicadas separados por comas.
+"""
+import csv
+from itertools import islice
+from json.encoder import encode_basestring
+
+from document_reader import CAMPOS
+
+# Documentos convertidos por vez al escribir o agregar a un lote
+BLOQUE = 10000
+
+# Claves JSON de cada campo, ya codificadas: todos los valores son texto o None, por lo que cada línea se arma sin
+# pasar por un diccionario ni por json.dumps
+_CLAVES_JSON = tuple(encode_basestring(campo) + ": " for campo in CAMPOS)
+
+
+def _valores(documento):
+    """
+    Retorna la tupla de valores de CAMPOS del documento, con tipo_documento (el primero) como texto y reparaciones
+    (el último) como sus nombres separados por comas
+    """
+    valores = documento if isinstance(documento, tuple) else tuple(map(vars(documento).get, CAMPOS))
+    if valores[0] is not None:
+        valores = (valores[0].value,) + valores[1:]
+    return valores if valores[-1] is None else valores[:-1] + (",".join(valores[-1]),)
+
+
+def _bloques(documentos):
+    """Generador de listas de hasta BLOQUE tuplas de valores, omitiendo los documentos None"""
+    valores = (_valores(documento) for documento in documentos if documento is not None)
+    bloque = list(islice(valores, BLOQUE))
+    while bloque:
+        yield bloque
+        bloque = list(islice(valores, BLOQUE))
+
+
+def escribir_jsonl(documentos, archivo):
+    """
+    Escribe en archivo (abierto en modo texto) un objeto JSON por línea con todos los CAMPOS de cada documento.
+    Retorna la cantidad de documentos escritos
+    """
+    escritos = 0
+    for bloque in _bloques(documentos):
+        archivo.write("".join("{" + ", ".join([clave + ("null" if valor is None else encode_basestring(valor))
+                                               for clave, valor in zip(_CLAVES_JSON, valores)]) + "}\n"
+                              for valores in bloque))
+        escritos += len(bloque)
+    return escritos
+
+
+def escribir_csv(documentos, archivo, encabezado=True):
+    """
+    Escribe en archivo (abierto en modo texto con newline="") una fila CSV por documento con todos los CAMPOS, en
+    ese orden, precedidas de una fila con los nombres de los campos si encabezado. Retorna la cantidad de
+    documentos escritos
+    """
+    escritor = csv.writer(archivo)
+    if encabezado:
+        escritor.writerow(CAMPOS)
+    escritos = 0
+    for bloque in _bloques(documentos):
+        escritor.writerows(bloque)
+        escritos += len(bloque)
+    return escritos
+
+
+class LoteColumnar(object):
+    """
+    Lote de documentos guardado en columnas: columnas tiene una lista por cada campo de CAMPOS, sin un objeto por
+    documento. Los documentos se transponen por bloques al agregarlos, por lo que puede llenarse directamente desde
+    Document.parse_many sin conservar los Document.
+    """
+
+    def __init__(self, documentos=()):
+        self.columnas = dict((campo, []) for campo in CAMPOS)
+        self.extend(documentos)
+
+    def extend(self, documentos):
+        """Agrega los documentos al lote, omitiendo los None"""
+        listas = [self.columnas[campo] for campo in CAMPOS]
+        for bloque in _bloques(documentos):
+            for lista, valores in zip(listas, zip(*bloque)):
+                lista.extend(valores)
+
+    def append(self, documento):
+        self.extend((documento,))
+
+    def __len__(self):
+        return len(self.columnas[CAMPOS[0]])
+
+    def __getitem__(self, campo):
+        return self.columnas[campo]
+
+    def a_numpy(self):
+        """
+        Retorna {campo: numpy.ndarray de dtype object y largo len(self)}, con los mismos valores que columnas y None
+        en los valores ausentes. Requiere numpy, que se importa al llamarlo
+        """
+        import numpy
+        return dict((campo, numpy.array(lista, dtype=object)) for campo, lista in self.columnas.items())
+
+    def a_arrow(self):
+        """
+        Retorna una pyarrow.Table con una columna de texto por campo, con null en los valores ausentes. Requiere
+        pyarrow
+        """
+        import pyarrow
+        return pyarrow.table(dict((campo, pyarrow.array(lista, type=pyarrow.string()))
+                                  for campo, lista in self.columnas.items()))
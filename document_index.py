@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+"""
+Índice de los documentos procesados por DNI y por número de trámite, para saber si un documento ya se leyó y si su
+ejemplar es el último conocido de esa persona o uno reemplazado.
+
+    from document_index import IndiceDocumentos
+
+    indice = IndiceDocumentos.cargar("documentos.idx")
+    for lectura in iter_documents(lecturas, rechazos=False):
+        estado = indice.agregar(lectura.documento)
+        ...
+    indice.guardar("documentos.idx")
+
+Los valores se guardan como enteros en arrays (DNI y trámite como números, ejemplar como su letra y la fecha de
+emisión como ordinal), sin un objeto por documento. El snapshot guarda esas columnas y las claves ordenadas; al
+cargarlo se mapea en memoria sin leerlo, las búsquedas sobre lo cargado son binarias y los documentos agregados
+después se guardan en memoria hasta el siguiente guardar.
+"""
+import mmap
+import os
+from array import array
+from bisect import bisect_left
+from collections import namedtuple
+from datetime import date
+from enum import Enum
+from struct import Struct
+from sys import byteorder
+from threading import Lock
+
+from document_reader import convertir_entero
+
+# Identificación y versión del snapshot, con el orden de bytes con el que se escribió
+_MAGIA = b"DRIDX1" + (b"L\0" if byteorder == "little" else b"B\0")
+# Cantidad de entradas, de DNI y de trámites
+_CABECERA = Struct("=8sQQQ")
+# DNI y trámites se guardan como enteros sin signo de 64 bits
+_LIMITE = 2 ** 64
+
+
+class EstadoEjemplar(Enum):
+    NUEVO = "Primer documento de la persona"
+    REPETIDO = "Documento ya leído"
+    REEMPLAZA = "Ejemplar posterior al último conocido de la persona"
+    REEMPLAZADO = "Ejemplar anterior al último conocido de la persona"
+
+
+"""
+Documento del índice: DNI y número de trámite como enteros, ejemplar (letra) y fecha de emisión como datetime.date.
+Cualquiera puede ser None si el formato leído no lo informa
+"""
+EntradaIndice = namedtuple("EntradaIndice", ("dni", "numero_tramite", "ejemplar", "fecha_emision_documento"))
+
+
+class IndiceDocumentos(object):
+    """
+    Índice en memoria de documentos por DNI (el último ejemplar) y por número de trámite, seguro para compartir
+    entre hilos. Un ejemplar es posterior a otro si su letra es mayor o, con la misma letra, su fecha de emisión es
+    posterior
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._mapa = None
+        # Columnas cargadas del snapshot (memoryview sobre el mmap) y claves ordenadas con su entrada
+        self._cargadas = 0
+        self._columnas_cargadas = None
+        self._claves_dni = self._entradas_dni = ()
+        self._claves_tramite = self._entradas_tramite = ()
+        # Entradas agregadas desde la carga, numeradas a continuación de las cargadas
+        self._dni = array("Q")
+        self._tramite = array("Q")
+        self._emision = array("I")
+        self._ejemplar = array("B")
+        self._por_dni = {}
+        self._por_tramite = {}
+
+    def __len__(self):
+        """Cantidad de documentos distintos indexados"""
+        return self._cargadas + len(self._dni)
+
+    def agregar(self, documento):
+        """
+        Agrega el documento (Document o DocumentRecord) al índice y retorna su EstadoEjemplar, o None si el
+        documento es None, no informa DNI ni número de trámite, o alguno no es un entero entre 0 y 2 ** 64 - 1
+        (un DNI negativo del campo libre de los DNI generación 1 y 2, un trámite mayor que ese límite), que no se
+        puede indexar. Los documentos repetidos no se agregan
+        """
+        if documento is None:
+            return None
+        dni, tramite = documento.dni_valor or 0, documento.numero_tramite_valor or 0
+        if not dni and not tramite or not (0 <= dni < _LIMITE and 0 <= tramite < _LIMITE):
+            return None
+        ejemplar = getattr(documento, "ejemplar", None)
+        ejemplar = ord(ejemplar) if ejemplar and len(ejemplar) == 1 and ejemplar <= "\xff" else 0
+        emision = documento.fecha_emision_documento_valor
+        emision = emision.toordinal() if emision is not None else 0
+        with self._lock:
+            if tramite and self._buscar(self._por_tramite, self._claves_tramite, self._entradas_tramite,
+                                        tramite) is not None:
+                return EstadoEjemplar.REPETIDO
+            ultimo = self._buscar(self._por_dni, self._claves_dni, self._entradas_dni, dni) if dni else None
+            if ultimo is None:
+                estado = EstadoEjemplar.NUEVO
+            else:
+                anterior = (self._columna(3, ultimo), self._columna(2, ultimo))
+                if (ejemplar, emision) == anterior and not tramite:
+                    return EstadoEjemplar.REPETIDO
+                estado = EstadoEjemplar.REEMPLAZA if (ejemplar, emision) > anterior else EstadoEjemplar.REEMPLAZADO
+            entrada = len(self)
+            self._dni.append(dni)
+            self._tramite.append(tramite)
+            self._emision.append(emision)
+            self._ejemplar.append(ejemplar)
+            if tramite:
+                self._por_tramite[tramite] = entrada
+            if dni and estado is not EstadoEjemplar.REEMPLAZADO:
+                self._por_dni[dni] = entrada
+            return estado
+
+    def buscar_dni(self, dni):
+        """Retorna la EntradaIndice del último ejemplar conocido del DNI (texto o entero), o None"""
+        dni = convertir_entero(dni)
+        entrada = self._buscar(self._por_dni, self._claves_dni, self._entradas_dni, dni) if dni else None
+        return None if entrada is None else self._entrada(entrada)
+
+    def buscar_tramite(self, numero_tramite):
+        """Retorna la EntradaIndice del número de trámite (texto o entero), o None"""
+        tramite = convertir_entero(numero_tramite)
+        entrada = (self._buscar(self._por_tramite, self._claves_tramite, self._entradas_tramite, tramite)
+                   if tramite else None)
+        return None if entrada is None else self._entrada(entrada)
+
+    @staticmethod
+    def _buscar(agregadas, claves, entradas, clave):
+        entrada = agregadas.get(clave)
+        if entrada is None:
+            posicion = bisect_left(claves, clave)
+            if posicion < len(claves) and claves[posicion] == clave:
+                entrada = entradas[posicion]
+        return entrada
+
+    def _columna(self, columna, entrada):
+        """Valor de la columna (0 DNI, 1 trámite, 2 emisión, 3 ejemplar) de la entrada"""
+        if entrada < self._cargadas:
+            return self._columnas_cargadas[columna][entrada]
+        return (self._dni, self._tramite, self._emision, self._ejemplar)[columna][entrada - self._cargadas]
+
+    def _entrada(self, entrada):
+        dni, tramite, emision, ejemplar = (self._columna(columna, entrada) for columna in range(4))
+        return EntradaIndice(dni or None, tramite or None, chr(ejemplar) if ejemplar else None,
+                             date.fromordinal(emision) if emision else None)
+
+    def guardar(self, ruta):
+        """
+        Escribe el snapshot del índice en ruta. Se escribe en un archivo temporal que luego reemplaza a ruta, por lo
+        que una interrupción no deja un snapshot incompleto
+        """
+        with self._lock:
+            cantidad = len(self)
+            columnas = [array(tipo, self._columnas_cargadas[columna].tobytes() if self._cargadas else b"") + agregadas
+                        for columna, (tipo, agregadas) in enumerate((("Q", self._dni), ("Q", self._tramite),
+                                                                     ("I", self._emision), ("B", self._ejemplar)))]
+            por_dni = dict(zip(self._claves_dni, self._entradas_dni))
+            por_dni.update(self._por_dni)
+            por_tramite = dict(zip(self._claves_tramite, self._entradas_tramite))
+            por_tramite.update(self._por_tramite)
+        claves_dni = sorted(por_dni)
+        claves_tramite = sorted(por_tramite)
+        temporal = ruta + ".tmp"
+        with open(temporal, "wb") as archivo:
+            archivo.write(_CABECERA.pack(_MAGIA, cantidad, len(claves_dni), len(claves_tramite)))
+            # Las columnas de 8 bytes primero, para que todas queden alineadas al mapearlas
+            for valores in (columnas[0], columnas[1],
+                            array("Q", claves_dni), array("Q", map(por_dni.get, claves_dni)),
+                            array("Q", claves_tramite), array("Q", map(por_tramite.get, claves_tramite)),
+                            columnas[2], columnas[3]):
+                valores.tofile(archivo)
+            archivo.flush()
+            os.fsync(archivo.fileno())
+        os.replace(temporal, ruta)
+
+    @classmethod
+    def cargar(cls, ruta):
+        """
+        Retorna el índice del snapshot en ruta, mapeado en memoria, o un índice vacío si ruta no existe. Lanza
+        ValueError si el archivo no es un snapshot de este índice
+        """
+        indice = cls()
+        if not os.path.exists(ruta) or os.path.getsize(ruta) == 0:
+            return indice
+        with open(ruta, "rb") as archivo:
+            mapa = mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(mapa) < _CABECERA.size:
+            mapa.close()
+            raise ValueError("Snapshot inválido: %s" % ruta)
+        magia, cantidad, dnis, tramites = _CABECERA.unpack_from(mapa)
+        vistas = []
+        posicion = _CABECERA.size
+        for tipo, largo in (("Q", cantidad), ("Q", cantidad), ("Q", dnis), ("Q", dnis), ("Q", tramites),
+                            ("Q", tramites), ("I", cantidad), ("B", cantidad)):
+            fin = posicion + largo * array(tipo).itemsize
+            vistas.append((tipo, posicion, fin))
+            posicion = fin
+        if magia != _MAGIA or posicion != len(mapa):
+            mapa.close()
+            raise ValueError("Snapshot inválido: %s" % ruta)
+        memoria = memoryview(mapa)
+        dni, tramite, claves_dni, entradas_dni, claves_tramite, entradas_tramite, emision, ejemplar = (
+            memoria[inicio:fin].cast(tipo) for tipo, inicio, fin in vistas)
+        indice._mapa = mapa
+        indice._cargadas = cantidad
+        indice._columnas_cargadas = (dni, tramite, emision, ejemplar)
+        indice._claves_dni, indice._entradas_dni = claves_dni, entradas_dni
+        indice._claves_tramite, indice._entradas_tramite = claves_tramite, entradas_tramite
+        return indice
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+Métricas del procesamiento de lecturas: qué formato coincide, cuántos se intentaron antes de la coincidencia y
+cuánto tardó cada lectura y cada formato.
+
+    from document_metrics import Metricas
+
+    metricas = Metricas().instalar()
+    ...
+    print(metricas.a_prometheus())
+
+Las métricas se registran con un observador de document_reader (ver agregar_observador), por lo que incluyen las
+lecturas de Document, Document.parse_many y de todos los módulos que los usan, dentro del mismo proceso. Sin
+observadores instalados el procesamiento no mide nada.
+"""
+import json
+from bisect import bisect_left
+from threading import Lock
+
+from document_reader import agregar_observador, quitar_observador
+
+# Límites superiores de los buckets de latencia, en segundos
+LIMITES_SEGUNDOS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.1)
+# Límites superiores de los buckets de formatos intentados por lectura
+LIMITES_INTENTOS = (1, 2, 3, 4, 5, 6)
+
+RECHAZADA = "RECHAZADA"
+
+
+class Histograma(object):
+    """
+    Histograma acumulable de buckets fijos, con la misma semántica que los histogramas de Prometheus
+    """
+
+    def __init__(self, limites):
+        self.limites = limites
+        self.conteos = [0] * (len(limites) + 1)
+        self.suma = 0
+        self.total = 0
+
+    def observar(self, valor):
+        self.conteos[bisect_left(self.limites, valor)] += 1
+        self.suma += valor
+        self.total += 1
+
+    def acumulados(self):
+        """Retorna pares (límite, cantidad de observaciones menores o iguales), el último con límite '+Inf'"""
+        acumulado = 0
+        resultado = []
+        for limite, conteo in zip(self.limites + ("+Inf",), self.conteos):
+            acumulado += conteo
+            resultado.append((limite, acumulado))
+        return resultado
+
+    def a_dict(self):
+        return {"buckets": self.acumulados(), "suma": self.suma, "total": self.total}
+
+
+class Metricas(object):
+    """
+    Registro de métricas en memoria, seguro para compartir entre hilos:
+
+        lecturas: coincidencias por (tipo de documento, teclado)
+        rechazos: lecturas rechazadas por MotivoRechazo
+        intentos: histograma de formatos intentados por lectura que coincidió, hasta el que coincidió inclusive
+        segundos: histograma de latencia por tipo de documento, o RECHAZADA
+        formatos: por nombre de formato, cantidad de intentos, coincidencias e histograma de latencia de cada intento
+    """
+
+    def __init__(self, limites_segundos=LIMITES_SEGUNDOS):
+        self.limites_segundos = limites_segundos
+        self._lock = Lock()
+        self.limpiar()
+
+    def limpiar(self):
+        with self._lock:
+            self.lecturas = {}
+            self.rechazos = {}
+            self.intentos = Histograma(LIMITES_INTENTOS)
+            self.segundos = {}
+            self.formatos = {}
+
+    def instalar(self):
+        """Registra las métricas como observador de document_reader. Retorna las métricas"""
+        agregar_observador(self)
+        return self
+
+    def desinstalar(self):
+        quitar_observador(self)
+
+    def __call__(self, documento, formato, motivo, intentos, segundos):
+        with self._lock:
+            if formato is not None:
+                clave = (documento.tipo_documento.name, documento.teclado)
+                self.lecturas[clave] = self.lecturas.get(clave, 0) + 1
+                # Con un OrdenFormatos, después del formato que coincide se pueden intentar los que lo preceden en
+                # el orden histórico, y el que coincidió no es necesariamente el último
+                self.intentos.observar(next(numero for numero, (intentado, _) in enumerate(intentos, 1)
+                                            if intentado is formato))
+                resultado = documento.tipo_documento.name
+            else:
+                self.rechazos[motivo.name] = self.rechazos.get(motivo.name, 0) + 1
+                resultado = RECHAZADA
+            self._histograma(self.segundos, resultado).observar(segundos)
+            for intentado, duracion in intentos:
+                estadistica = self.formatos.get(intentado.nombre)
+                if estadistica is None:
+                    estadistica = self.formatos[intentado.nombre] = [0, 0, Histograma(self.limites_segundos)]
+                estadistica[0] += 1
+                estadistica[1] += intentado is formato
+                estadistica[2].observar(duracion)
+
+    def _histograma(self, histogramas, clave):
+        histograma = histogramas.get(clave)
+        if histograma is None:
+            histograma = histogramas[clave] = Histograma(self.limites_segundos)
+        return histograma
+
+    def a_dict(self):
+        """Retorna las métricas como diccionario serializable"""
+        with self._lock:
+            return {"lecturas": [{"tipo_documento": tipo, "teclado": teclado, "total": total}
+                                 for (tipo, teclado), total in sorted(self.lecturas.items())],
+                    "rechazos": dict(sorted(self.rechazos.items())),
+                    "intentos": self.intentos.a_dict(),
+                    "segundos": {resultado: histograma.a_dict()
+                                 for resultado, histograma in sorted(self.segundos.items())},
+                    "formatos": {nombre: {"intentos": intentos, "coincidencias": coincidencias,
+                                          "segundos": histograma.a_dict()}
+                                 for nombre, (intentos, coincidencias, histograma) in sorted(self.formatos.items())}}
+
+    def a_json(self):
+        return json.dumps(self.a_dict(), ensure_ascii=False)
+
+    def a_prometheus(self, prefijo="document_reader"):
+        """Retorna las métricas en el formato de texto de exposición de Prometheus"""
+        datos = self.a_dict()
+        lineas = []
+
+        def metrica(nombre, tipo, ayuda):
+            lineas.append("# HELP %s_%s %s" % (prefijo, nombre, ayuda))
+            lineas.append("# TYPE %s_%s %s" % (prefijo, nombre, tipo))
+
+        def muestra(nombre, etiquetas, valor):
+            texto = ",".join('%s="%s"' % (clave, _escapar(valor)) for clave, valor in etiquetas)
+            lineas.append("%s_%s%s %s" % (prefijo, nombre, "{%s}" % texto if texto else "", _numero(valor)))
+
+        def histograma(nombre, etiquetas, valores):
+            for limite, acumulado in valores["buckets"]:
+                muestra(nombre + "_bucket", etiquetas + (("le", limite),), acumulado)
+            muestra(nombre + "_sum", etiquetas, valores["suma"])
+            muestra(nombre + "_count", etiquetas, valores["total"])
+
+        metrica("lecturas_total", "counter", "Lecturas reconocidas por tipo de documento y teclado")
+        for lectura in datos["lecturas"]:
+            muestra("lecturas_total", (("tipo_documento", lectura["tipo_documento"]),
+                                       ("teclado", lectura["teclado"])), lectura["total"])
+        metrica("rechazos_total", "counter", "Lecturas rechazadas por motivo")
+        for motivo, total in datos["rechazos"].items():
+            muestra("rechazos_total", (("motivo", motivo),), total)
+        metrica("intentos", "histogram", "Formatos intentados por lectura reconocida")
+        histograma("intentos", (), datos["intentos"])
+        metrica("segundos", "histogram", "Duración de cada lectura por tipo de documento")
+        for resultado, valores in datos["segundos"].items():
+            histograma("segundos", (("tipo_documento", resultado),), valores)
+        metrica("formato_intentos_total", "counter", "Intentos de cada formato")
+        for nombre, valores in datos["formatos"].items():
+            muestra("formato_intentos_total", (("formato", nombre),), valores["intentos"])
+        metrica("formato_coincidencias_total", "counter", "Coincidencias de cada formato")
+        for nombre, valores in datos["formatos"].items():
+            muestra("formato_coincidencias_total", (("formato", nombre),), valores["coincidencias"])
+        metrica("formato_segundos", "histogram", "Duración de cada intento de un formato")
+        for nombre, valores in datos["formatos"].items():
+            histograma("formato_segundos", (("formato", nombre),), valores["segundos"])
+        return "\n".join(lineas) + "\n"
+
+
+def _escapar(valor):
+    return str(valor).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _numero(valor):
+    return repr(valor) if isinstance(valor, float) else str(valor)
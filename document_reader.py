@@ -1,6 +1,112 @@
 # -*- coding: utf-8 -*-
+from collections import namedtuple
+from datetime import date
 from enum import Enum
-from re import search, match, sub
+from functools import lru_cache, partial
+from re import compile as compile_pattern, escape
+from sys import intern, maxsize
+from time import perf_counter
+
+
+# Blancos salvo el salto de línea, que separa los campos del carnet de conductor
+_espacios = compile_pattern(r"[^\S\n]+")
+# Relleno al final de un campo o línea, y al comienzo de una línea, ya reducido a un espacio
+_relleno = compile_pattern(r' (?=[\n@"])|(?<=\n) ')
+
+_CIFRAS = "0123456789"
+_LETRAS = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyzÁÉÍÓÚÜñáéíóúüÑ'"
+_LETRAS_LLAVE = _LETRAS + "{"
+_ALFANUMERICOS = _LETRAS + ".°" + _CIFRAS
+
+
+def normalizar(input_string):
+    """
+    Retorna la lectura tal como la procesa Document: los blancos de cada campo reducidos a un espacio, sin el
+    relleno al final de los campos ('14808837    @') ni al comienzo o final de cada línea. Los saltos de línea se
+    conservan, y los retornos de carro que envían algunos lectores se leen como saltos de línea
+    """
+    if "\r" in input_string:
+        input_string = input_string.replace("\r\n", "\n").replace("\r", "\n")
+    # Es necesario reemplazar los espacios múltiples por espacios simples
+    muestra = _espacios.sub(" ", input_string).strip()
+    if " @" in muestra or " \"" in muestra or " \n" in muestra or "\n " in muestra:
+        return _relleno.sub("", muestra)
+    return muestra
+
+
+"""
+Reparación de una falla conocida de los lectores: nombre de la reparación, texto leído y texto correcto. Las
+reparaciones se aplican a la lectura normalizada antes de clasificarla y extraer los campos, por lo que los patrones
+de Document no admiten las fallas reparables; Document.muestra conserva la lectura sin reparar. Sólo se reparan las
+fallas sin ambigüedad: la vocal acentuada leída como '{' (BEL{EN, MART{N) no se repara, porque '{' seguida de una
+vocal puede ser la tilde de esa vocal o la vocal acentuada anterior perdida (MAR{A es MARÍA, no MARÁ), y se admite en
+los nombres del DNI generación 3
+"""
+Reparacion = namedtuple("Reparacion", ("nombre", "leido", "correcto"))
+
+REPARACIONES = (
+    # Con teclado US, ':' se lee 'Ñ' en las palabras constantes del domicilio del carnet de conductor
+    tuple(Reparacion("domicilio_us", palabra + "Ñ", palabra + ":") for palabra in ("Piso", "Depto", "Barrio"))
+)
+_REPARACIONES = dict((reparacion.leido, reparacion) for reparacion in REPARACIONES)
+_REPARABLE = compile_pattern("|".join(escape(reparacion.leido) for reparacion in REPARACIONES))
+# Caracteres de las fallas que no son letras ASCII: si la lectura no tiene ninguno, no hay nada que reparar
+_DISPAROS = tuple(frozenset(caracter for reparacion in REPARACIONES for caracter in reparacion.leido
+                            if caracter not in _LETRAS[:52]))
+
+
+def reparar(muestra):
+    """
+    Aplica REPARACIONES a la muestra en una pasada. Retorna (muestra reparada, tupla de los nombres de las
+    reparaciones aplicadas, en el orden en que aparecen)
+    """
+    for caracter in _DISPAROS:
+        if caracter in muestra:
+            break
+    else:
+        return muestra, ()
+    aplicadas = []
+
+    def corregir(coincidencia):
+        reparacion = _REPARACIONES[coincidencia.group()]
+        if reparacion.nombre not in aplicadas:
+            aplicadas.append(reparacion.nombre)
+        return reparacion.correcto
+
+    return _REPARABLE.sub(corregir, muestra), tuple(aplicadas)
+
+
+"""
+Los lectores configurados con teclado US envían '"' en lugar del separador '@' y '-' en lugar del separador de fechas
+'/'. La forma canónica es la del teclado ES: una lectura US se lleva a ella intercambiando esos caracteres, lo que
+conserva la longitud y la posición de cada campo. El intercambio es su propia inversa.
+"""
+
+
+def _intercambiar(muestra, a, b):
+    # Dos str.replace son varias veces más rápidos que str.translate, que no tiene camino rápido fuera de ASCII
+    if b not in muestra:
+        return muestra.replace(a, b)
+    if a not in muestra:
+        return muestra.replace(b, a)
+    return muestra.translate({ord(a): b, ord(b): a})
+
+
+def intercambiar_teclado(muestra):
+    """Intercambia los separadores de los teclados US y ES: comillas y arroba, guion y barra"""
+    return _intercambiar(_intercambiar(muestra, "\"", "@"), "-", "/")
+
+
+def _canonizar(muestra):
+    """
+    Detecta en una pasada el teclado de la lectura: el separador de campos más frecuente, o si no hay separadores
+    (carnet de conductor), la presencia del separador de fechas ES. Retorna (teclado, muestra en forma canónica)
+    """
+    comillas = muestra.count("\"")
+    arrobas = muestra.count("@")
+    if comillas > arrobas or (comillas == arrobas and "/" not in muestra):
+        return "US", intercambiar_teclado(muestra)
+    return "ES", muestra
 
 
 class TipoDocumento(Enum):
@@ -10,7 +116,407 @@ class TipoDocumento(Enum):
     DNI_GEN_3 = "DNI generación 3"
 
 
-class Document(object):
+class Sexo(Enum):
+    M = "Masculino"
+    F = "Femenino"
+    X = "No binario"
+
+
+@lru_cache(maxsize=8192)
+def convertir_fecha(texto):
+    """
+    Retorna el datetime.date de una fecha leída 'dd/mm/aaaa' (teclado ES) o 'dd-mm-aaaa' (teclado US), o None si
+    texto es None o no es una fecha válida. Las fechas se repiten mucho entre lecturas (nacimiento, emisión), por lo
+    que las conversiones se guardan en una cache compartida
+    """
+    if texto is None or len(texto) != 10 or texto[2] != texto[5] or texto[2] not in "/-":
+        return None
+    try:
+        return date(int(texto[6:]), int(texto[3:5]), int(texto[:2]))
+    except ValueError:
+        return None
+
+
+def convertir_entero(texto):
+    """Retorna el entero de un campo numérico leído (DNI, número de trámite), o None si no es un entero"""
+    try:
+        return int(texto)
+    except (TypeError, ValueError):
+        return None
+
+
+class CamposTipados(object):
+    """
+    Valores tipados de los campos de Document y DocumentRecord, calculados al accederlos. Las fechas pasan por la
+    cache compartida de convertir_fecha; los enteros y el sexo se convierten en cada acceso, ya que int() y la
+    búsqueda en el Enum cuestan menos que guardarlos. Un campo ausente (Document sólo tiene los atributos que informa
+    su formato) o que no se puede convertir da None
+    """
+    __slots__ = ()
+
+    @property
+    def fecha_nacimiento_valor(self):
+        return convertir_fecha(getattr(self, "fecha_nacimiento", None))
+
+    @property
+    def fecha_emision_documento_valor(self):
+        return convertir_fecha(getattr(self, "fecha_emision_documento", None))
+
+    @property
+    def fecha_vencimiento_documento_valor(self):
+        return convertir_fecha(getattr(self, "fecha_vencimiento_documento", None))
+
+    @property
+    def dni_valor(self):
+        return convertir_entero(getattr(self, "dni", None))
+
+    @property
+    def numero_tramite_valor(self):
+        return convertir_entero(getattr(self, "numero_tramite", None))
+
+    @property
+    def sexo_valor(self):
+        sexo = getattr(self, "sexo", None)
+        return Sexo.__members__.get(sexo) if sexo is not None else None
+
+
+class ModoLectura(Enum):
+    """
+    REGEX: cada formato se valida con su expresión regular sobre la muestra completa.
+    TOKENS: la muestra se parte una sola vez por separador y cada campo se valida en su posición con chequeos
+    lineales, por lo que el tiempo por lectura queda acotado aunque el lector envíe basura repetida. Produce los
+    mismos atributos que REGEX, salvo en lecturas corruptas donde el patrón coincide desplazado respecto de la
+    posición de los campos: REGEX extrae los campos corridos y TOKENS rechaza la lectura.
+    """
+    REGEX = "regex"
+    TOKENS = "tokens"
+
+
+"""
+Validadores por campo del modo TOKENS. Todos recorren el valor una sola vez (str.strip con un conjunto de
+caracteres es lineal), equivalentes a los fragmentos de las expresiones regulares de Document.
+"""
+
+
+def _es_cifras(valor, minimo=1, maximo=maxsize):
+    return minimo <= len(valor) <= maximo and not valor.strip(_CIFRAS)
+
+
+def _es_palabra(valor, letras=_LETRAS):
+    return valor != "" and not valor.strip(letras)
+
+
+def _es_nombre(valor, letras=_LETRAS):
+    return all(_es_palabra(parte, letras) for parte in valor.split(" "))
+
+
+def _es_letra(valor):
+    return len(valor) == 1 and "A" <= valor <= "Z"
+
+
+def _es_fecha(valor, separador):
+    return (len(valor) == 10 and valor[2] == separador and valor[5] == separador
+            and not (valor[:2] + valor[3:5] + valor[6:]).strip(_CIFRAS))
+
+
+def _empieza_con_fecha(valor, separador):
+    return _es_fecha(valor[:10], separador)
+
+
+def _termina_en(valor, caracteres):
+    return valor != "" and valor[-1] in caracteres
+
+
+def _empieza_con(valor, caracteres):
+    return valor != "" and valor[0] in caracteres
+
+
+def _empieza_con_palabra(valor, palabra):
+    return valor.startswith(palabra)
+
+
+def _es_numero_tramite_gen_dos(valor):
+    return _es_cifras(valor.rstrip(" "), 4)
+
+
+def _es_numero_calle(valor):
+    return valor == "" or (valor[0] == "N" and _es_cifras(valor[1:].lstrip(" ")))
+
+
+"""
+Pares de formatos que no pueden coincidir ambos con una misma lectura en modo TOKENS, por tener en alguna posición
+validadores incompatibles (posición: validadores)
+"""
+_EXCLUSIVOS_TOKENS = frozenset(par for a, b in (
+    ("dni_gen_tres", "dni_gen_tres_soft"),  # 0: termina en cifra / termina en letra
+    ("dni_gen_tres", "dni_gen_dos"),  # 3: letra / cifra
+    ("dni_gen_tres", "dni_gen_uno"),  # 3: letra / cifra
+    ("dni_gen_tres", "dni_gen_uno_soft"),  # 4: cifras / nombre
+    ("dni_gen_tres_soft", "dni_gen_dos"),  # 3: 7 a 9 cifras / una cifra
+    ("dni_gen_tres_soft", "dni_gen_uno"),  # 3: 7 a 9 cifras / una cifra
+    ("dni_gen_tres_soft", "dni_gen_uno_soft"),  # 2: letra / cifra
+    ("dni_gen_dos", "dni_gen_uno"),  # 12: fecha / cifras
+    ("dni_gen_dos", "dni_gen_uno_soft"),  # 2: letra / cifra
+    ("dni_gen_uno", "dni_gen_uno_soft"),  # 2: letra / cifra
+) for par in ((a, b), (b, a)))
+
+
+class MotivoRechazo(Enum):
+    VACIA = "Lectura vacía"
+    SIN_ESTRUCTURA = "La lectura no tiene los separadores ni campos de ningún formato"
+    SIN_COINCIDENCIA = "Ningún formato coincide con la lectura"
+
+
+"""
+Resultado de Document.parse_many: número de lectura (desde 1), cadena recibida, documento procesado (None si fue
+rechazada) y motivo de rechazo (None si fue procesada)
+"""
+Lectura = namedtuple("Lectura", ("numero", "entrada", "documento", "motivo"))
+
+
+"""
+Formato de lectura, evaluado en el orden histórico de Document._formatos sobre la muestra en forma canónica:
+
+    nombre: nombre del formato; en los históricos, el del atributo de Document con la expresión regular
+    patron: expresión regular compilada (modo REGEX)
+    guardia: expresión regular lineal que toda lectura que cumple patron contiene (None si no hay), usada por
+        OrdenFormatos para descartar el formato sin aplicar patron
+    separador, minimo, maximo: separador de campos y rango de cantidad de campos admitido
+    prefijo, fecha: prefijo obligatorio y caracter separador de fechas que debe aparecer en la muestra
+    tipo_documento: valor informado al coincidir
+    extraer: función generada que asigna los atributos a partir de los campos
+    campos: pares (posición, validador) del modo TOKENS
+"""
+Formato = namedtuple("Formato", ("nombre", "patron", "guardia", "separador", "minimo", "maximo", "prefijo", "fecha",
+                                 "tipo_documento", "extraer", "campos"))
+
+# Líneas del carnet de conductor, la primera 'DNI'. Los demás documentos ocupan una línea
+LINEAS_CONDUCTOR = 19
+# Separadores de campos de los documentos de una línea, con teclado ES y US. Ninguna línea del carnet de conductor
+# los tiene, por lo que una línea con alguno de ellos no continúa un carnet
+SEPARADORES_LINEA = ("@", "\"")
+
+
+"""
+Tipo de un campo de un formato declarado (ver CampoFormato): fragmento de expresión regular del campo, sin el
+separador, y su validador del modo TOKENS, equivalentes. Un tipo sin validador admite cualquier valor. En el fragmento,
+_RESTO representa cualquier texto sin el separador de campos
+"""
+TipoCampo = namedtuple("TipoCampo", ("patron", "valida"))
+
+_RESTO = "(?#resto)"
+_PALABRA = "[A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}"
+_PALABRA_LLAVE = "[A-Za-zÁÉÍÓÚÜñáéíóúüÑ{\']{1,}"
+_PALABRA_ALFANUMERICA = "[A-Za-zÁÉÍÓÚÜñáéíóúüÑ\'\\.°0-9]{1,}"
+_FECHA = "[0-9]{2}[/][0-9]{2}[/][0-9]{4}"
+
+LIBRE = TipoCampo(_RESTO, None)
+LETRA = TipoCampo("[A-Z]", _es_letra)
+CIFRAS = TipoCampo("[0-9]{1,}", _es_cifras)
+PALABRA = TipoCampo(_PALABRA, _es_palabra)
+NOMBRE = TipoCampo(_PALABRA + "([ ]" + _PALABRA + "){0,}", _es_nombre)
+NOMBRE_ALFANUMERICO = TipoCampo(_PALABRA_ALFANUMERICA + "([ ]" + _PALABRA_ALFANUMERICA + "){0,}",
+                                partial(_es_nombre, letras=_ALFANUMERICOS))
+FECHA = TipoCampo(_FECHA, partial(_es_fecha, separador="/"))
+
+
+def cifras(minimo=1, maximo=maxsize):
+    """TipoCampo de entre minimo y maximo cifras"""
+    return TipoCampo("[0-9]{%d,%s}" % (minimo, "" if maximo == maxsize else maximo),
+                     partial(_es_cifras, minimo=minimo, maximo=maximo))
+
+
+def constante(texto):
+    """TipoCampo que sólo admite texto"""
+    return TipoCampo(escape(texto), texto.__eq__)
+
+
+def empieza_con(texto):
+    """TipoCampo que empieza con texto, seguido de cualquier valor"""
+    return TipoCampo(escape(texto) + _RESTO, partial(_empieza_con_palabra, palabra=texto))
+
+
+# Tipos propios de los formatos históricos
+_EMPIEZA_CON_FECHA = TipoCampo(_FECHA + _RESTO, partial(_empieza_con_fecha, separador="/"))
+_EMPIEZA_CON_MAYUSCULA = TipoCampo("[A-Z]" + _RESTO, partial(_empieza_con, caracteres=_LETRAS[:26]))
+_EMPIEZA_CON_CIFRA = TipoCampo("[0-9]" + _RESTO, partial(_empieza_con, caracteres=_CIFRAS))
+_TERMINA_EN_CIFRA = TipoCampo(_RESTO + "[0-9]", partial(_termina_en, caracteres=_CIFRAS))
+_TERMINA_EN_LETRA = TipoCampo(_RESTO + "[A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']", partial(_termina_en, caracteres=_LETRAS))
+_UNA_CIFRA = TipoCampo("[0-9]", partial(_es_cifras, maximo=1))
+# Nombre del DNI generación 3, que admite la vocal acentuada leída como '{' (ver REPARACIONES)
+_NOMBRE_LLAVE = TipoCampo(_PALABRA_LLAVE + "([ ]" + _PALABRA_LLAVE + "){0,}", partial(_es_nombre, letras=_LETRAS_LLAVE))
+_NUMERO_CALLE = TipoCampo("([N][ ]*[0-9]{1,})?", _es_numero_calle)
+_CIFRAS_RELLENO = TipoCampo("[0-9]{4,}[ ]*", _es_numero_tramite_gen_dos)
+
+
+"""
+Campo de un formato declarado, en su posición:
+
+    atributo: atributo de Document (uno de CAMPOS) donde se informa el valor (None, el campo no se informa)
+    tipo: TipoCampo
+    convertir: función de texto en texto (o None) que se aplica al valor al informarlo (None, el valor leído). Las
+        exportaciones y la validación trabajan con texto: si retorna otro tipo, la lectura lanza TypeError
+    opcional: el lector puede omitir el campo completo; el formato se declara también en una versión 'soft' sin él,
+        que informa el atributo en None
+    truncado: el campo llega incompleto (por ejemplo, sin su comienzo): se valida con tipo y el atributo se informa
+        en None
+"""
+CampoFormato = namedtuple("CampoFormato", ("atributo", "tipo", "convertir", "opcional", "truncado"),
+                          defaults=(None, LIBRE, None, False, False))
+
+_SEPARADORES = ("@", "\n")
+
+
+def _patron(separador, campos, abierto):
+    """Expresión regular anclada de los campos, más cualquier cantidad de campos al final si abierto"""
+    separador = escape(separador)
+    resto = "[^%s]*" % separador
+    patron = separador.join("(?:%s)" % campo.tipo.patron.replace(_RESTO, resto) for campo in campos)
+    return "^" + patron + ("(?:%s(?s:.*))?" % separador if abierto else "") + "\\Z"
+
+
+def _texto(valor, atributo):
+    """Retorna valor, el resultado de una conversión de atributo, si es texto o None. Si no, lanza TypeError"""
+    if valor is None or isinstance(valor, str):
+        return valor
+    raise TypeError("La conversión de %s debe retornar texto, no %s" % (atributo, type(valor).__name__))
+
+
+def _extractor(nombre, asignaciones):
+    """
+    Genera la función extraer del formato nombre, que asigna a un Document, en orden, los atributos de asignaciones:
+    (atributo, posición del valor o None para informarlo en None, conversión del valor o None). Se genera el código
+    de una asignación por atributo, como en un método escrito a mano, que cuesta varias veces menos que asignarlos
+    en un ciclo. Los valores de las conversiones que no son métodos de str se controlan (ver CampoFormato)
+    """
+    lineas = ["def extraer(self, values):"]
+    espacio = {"_texto": _texto}
+    for numero, (atributo, posicion, convertir) in enumerate(asignaciones):
+        valor = "None" if posicion is None else "values[%d]" % posicion
+        if posicion is not None and convertir is not None:
+            espacio["convertir_%d" % numero] = convertir
+            valor = "convertir_%d(%s)" % (numero, valor)
+            if getattr(str, getattr(convertir, "__name__", ""), None) is not convertir:
+                valor = "_texto(%s, %r)" % (valor, atributo)
+        lineas.append("    self.%s = %s" % (atributo, valor))
+    lineas.append("    return None")
+    exec("\n".join(lineas), espacio)
+    extraer = espacio["extraer"]
+    extraer.__qualname__ = extraer.__name__ = "_extraer_" + nombre
+    return extraer
+
+
+def declarar_formato(nombre, tipo_documento, separador, campos, abierto=False, prefijo="", fecha="", guardia=None,
+                     patrones=None):
+    """
+    Retorna la tupla de Formato declarada por campos, la secuencia de CampoFormato en el orden de la lectura: el
+    formato nombre y, si algún campo es opcional, su versión nombre + '_soft' sin esos campos. La cantidad de campos
+    de la lectura es la de campos, o más si abierto; separador es '@' (una línea) o '\\n' (un campo por línea) y
+    prefijo y fecha, el comienzo y un caracter que toda lectura del formato tiene (ver Formato).
+
+    El patrón del modo REGEX se genera anclado a los campos, por lo que da el mismo resultado que los validadores
+    del modo TOKENS, y los atributos se informan en el orden de los campos. patrones reemplaza los patrones generados
+    (uno por cada formato retornado): los formatos históricos conservan los suyos (ver ModoLectura). Lanza ValueError
+    si el separador o algún atributo no se admiten
+    """
+    if separador not in _SEPARADORES:
+        raise ValueError("Separador no admitido: %r" % separador)
+    desconocidos = [campo.atributo for campo in campos if campo.atributo is not None and campo.atributo not in CAMPOS]
+    if desconocidos:
+        raise ValueError("Atributos desconocidos: " + ", ".join(desconocidos))
+    versiones = [(nombre, False)]
+    if any(campo.opcional for campo in campos):
+        versiones.append((nombre + "_soft", True))
+    formatos = []
+    for numero, (version, soft) in enumerate(versiones):
+        leidos = [campo for campo in campos if not (soft and campo.opcional)]
+        asignaciones = []
+        posicion = 0
+        for campo in campos:
+            omitido = soft and campo.opcional
+            if campo.atributo is not None:
+                asignaciones.append((campo.atributo, None if omitido or campo.truncado else posicion, campo.convertir))
+            if not omitido:
+                posicion += 1
+        patron = patrones[numero] if patrones else _patron(separador, leidos, abierto)
+        formatos.append(Formato(version, compile_pattern(patron), guardia, separador, len(leidos),
+                                maxsize if abierto else len(leidos), prefijo, fecha, tipo_documento,
+                                _extractor(version, asignaciones),
+                                tuple((indice, campo.tipo.valida) for indice, campo in enumerate(leidos)
+                                      if campo.tipo.valida is not None)))
+    return tuple(formatos)
+
+
+"""
+Campos de los formatos históricos
+"""
+_CAMPOS_CONDUCTOR = (
+    CampoFormato(tipo=constante("DNI")), CampoFormato("dni", cifras(7, 9)), CampoFormato("sexo", LETRA),
+    CampoFormato("nombres", NOMBRE), CampoFormato("apellidos", NOMBRE), CampoFormato("fecha_nacimiento", FECHA),
+    CampoFormato("pais", PALABRA), CampoFormato("direccion_calle", NOMBRE_ALFANUMERICO),
+    CampoFormato("direccion_numero", _NUMERO_CALLE), CampoFormato("direccion_piso", empieza_con("Piso:")),
+    CampoFormato("direccion_depto", empieza_con("Depto:")), CampoFormato("direccion_barrio", empieza_con("Barrio:")),
+    CampoFormato("ciudad", NOMBRE_ALFANUMERICO), CampoFormato("codigo_postal", CIFRAS),
+    CampoFormato("fecha_emision_documento", FECHA), CampoFormato("fecha_vencimiento_documento", FECHA),
+    CampoFormato("carnet_conductor_categoria", _EMPIEZA_CON_MAYUSCULA),
+    CampoFormato("grupo_factor_sanguineo", _EMPIEZA_CON_MAYUSCULA),
+    CampoFormato("numero_tramite", _EMPIEZA_CON_CIFRA),
+)
+
+# Desde el apellido, campos comunes al DNI generación 3 y su versión 'soft', que empieza con el final del apellido
+_CAMPOS_GEN_TRES = (
+    CampoFormato("nombres", _NOMBRE_LLAVE), CampoFormato("sexo", LETRA), CampoFormato("dni", cifras(7, 9)),
+    CampoFormato("ejemplar", LETRA), CampoFormato("fecha_nacimiento", FECHA),
+    CampoFormato("fecha_emision_documento", _EMPIEZA_CON_FECHA),
+)
+
+# DNI de los DNI generación 1 y 2, precedido de un campo desconocido o vacío, y campos comunes a ambos hasta el
+# número de trámite
+_DNI_GEN_UNO_DOS = CampoFormato("dni", convertir=str.strip)
+_CAMPOS_GEN_UNO_DOS = (
+    CampoFormato("ejemplar", LETRA), CampoFormato(tipo=_UNA_CIFRA), CampoFormato("apellidos", NOMBRE),
+    CampoFormato("nombres", NOMBRE),
+    CampoFormato("pais", PALABRA), CampoFormato("fecha_nacimiento", FECHA), CampoFormato("sexo", LETRA),
+    CampoFormato("fecha_emision_documento", FECHA), CampoFormato("numero_tramite", cifras(10)),
+)
+
+
+"""
+Observadores de las lecturas, ver agregar_observador. Sin observadores, el único costo es comprobar que la lista
+está vacía.
+"""
+_observadores = []
+
+
+def agregar_observador(observador):
+    """
+    Registra observador(documento, formato, motivo, intentos, segundos), que se llama al terminar cada lectura con
+    el Document procesado, el Formato que coincidió (None si fue rechazada), el MotivoRechazo (None si algún formato
+    coincidió), la lista de pares (Formato, segundos) de cada formato intentado, en orden, y los segundos totales de
+    la lectura. Con un OrdenFormatos, formato no es necesariamente el último intentado (ver OrdenFormatos)
+    """
+    _observadores.append(observador)
+
+
+def quitar_observador(observador):
+    _observadores.remove(observador)
+
+"""
+Atributos que puede tener un Document procesado. Cada formato asigna sólo una parte de ellos
+"""
+CAMPOS = ("tipo_documento", "teclado", "muestra", "dni", "sexo", "nombres", "apellidos", "fecha_nacimiento", "pais",
+          "direccion_calle", "direccion_numero", "direccion_piso", "direccion_depto", "direccion_barrio", "ciudad",
+          "codigo_postal", "fecha_emision_documento", "fecha_vencimiento_documento", "carnet_conductor_categoria",
+          "grupo_factor_sanguineo", "numero_tramite", "ejemplar", "of_ident", "reparaciones")
+
+# Campos con pocos valores distintos, que se comparten entre registros en lugar de repetirse en cada uno
+CAMPOS_INTERNADOS = frozenset(("teclado", "sexo", "pais", "ejemplar", "fecha_nacimiento", "fecha_emision_documento",
+                               "fecha_vencimiento_documento", "of_ident", "direccion_piso", "direccion_depto",
+                               "direccion_barrio", "ciudad", "codigo_postal", "carnet_conductor_categoria",
+                               "grupo_factor_sanguineo"))
+
+
+class Document(CamposTipados):
     """
     Clase contenedora de datos procesados en función de la lectura del documento.
     Incorpora una variable teclado_interpretado, para retornar cómo se entendió la cadena provista
@@ -95,47 +601,30 @@ class Document(object):
         123631787
 
     """
-    carnet_conductor_us = "".join(("^DNI\n",
-                                   "[0-9]{7,9}\n",
-                                   "[A-Z]{1}\n",
-                                   "[A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}([\s][A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}){0,}\n",
-                                   "[A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}([\s][A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}){0,}\n",
-                                   "[0-9]{2}[-][0-9]{2}[-][0-9]{4}\n",
-                                   "[A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}\n",
-                                   "[A-Za-zÁÉÍÓÚÜñáéíóúüÑ\'\.°0-9]{1,}([\s][A-Za-zÁÉÍÓÚÜñáéíóúüÑ\'\.°0-9]{1,}){0,}\n",
-                                   "([N][0-9]{1,}){0,}\n",
-                                   # TODO No matchea para las palabras constantes con teclado US. Se usa el comodín en esa parte.
-                                   "*",
-                                   "Piso(.*)\n",
-                                   "Depto(.*)\n",
-                                   "Barrio(.*)\n",
-                                   "[A-Za-zÁÉÍÓÚÜñáéíóúüÑ\'\.°0-9]{1,}([\s][A-Za-zÁÉÍÓÚÜñáéíóúüÑ\'\.°0-9]{1,}){0,}\n",
-                                   "[0-9]{1,}\n",
-                                   "[0-9]{2}[-][0-9]{2}[-][0-9]{4}\n",
-                                   "[0-9]{2}[-][0-9]{2}[-][0-9]{4}\n",
-                                   "[A-Z]([^\n]*)\n",
-                                   "[A-Z]([^\n]*)\n",
-                                   "[0-9]{1,}"))
-
-    carnet_conductor_es = "".join(("^DNI\n",
-                                   "[0-9]{7,9}\n",
-                                   "[A-Z]{1}\n",
-                                   "[A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}([\s][A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}){0,}\n",
-                                   "[A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}([\s][A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}){0,}\n",
-                                   "[0-9]{2}[-][0-9]{2}[-][0-9]{4}\n",
-                                   "[A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}\n",
-                                   "[A-Za-zÁÉÍÓÚÜñáéíóúüÑ\'\.°0-9]{1,}([\s][A-Za-zÁÉÍÓÚÜñáéíóúüÑ\'\.°0-9]{1,}){0,}\n",
-                                   "([N][\s][0-9]{1,}){0,}\n",
-                                   "Piso:(.*)\n",
-                                   "Depto:(.*)\n",
-                                   "Barrio:(.*)\n",
-                                   "[A-Za-zÁÉÍÓÚÜñáéíóúüÑ\'\.°0-9]{1,}([\s][A-Za-zÁÉÍÓÚÜñáéíóúüÑ\'\.°0-9]{1,}){0,}\n",
-                                   "[0-9]{1,}\n",
-                                   "[0-9]{2}[-][0-9]{2}[-][0-9]{4}\n",
-                                   "[0-9]{2}[-][0-9]{2}[-][0-9]{4}\n",
-                                   "[A-Z]([^\n]*)\n",
-                                   "[A-Z]([^\n]*)\n",
-                                   "[0-9]{1,}"))
+    """
+    Las expresiones regulares se aplican sobre la forma canónica de la lectura (teclado ES, ver _canonizar), ya
+    reparada (ver REPARACIONES). Las palabras constantes del domicilio se leen 'PisoÑ' con teclado US, que se repara
+    como 'Piso:', y el resto de esas líneas es libre.
+    """
+    carnet_conductor = "".join(("^DNI\n",
+                                "[0-9]{7,9}\n",
+                                "[A-Z]{1}\n",
+                                "[A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}([ ][A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}){0,}\n",
+                                "[A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}([ ][A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}){0,}\n",
+                                "[0-9]{2}[/][0-9]{2}[/][0-9]{4}\n",
+                                "[A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}\n",
+                                "[A-Za-zÁÉÍÓÚÜñáéíóúüÑ\'\\.°0-9]{1,}([ ][A-Za-zÁÉÍÓÚÜñáéíóúüÑ\'\\.°0-9]{1,}){0,}\n",
+                                "([N][ ]?[0-9]{1,}){0,}\n",
+                                "Piso:(.*)\n",
+                                "Depto:(.*)\n",
+                                "Barrio:(.*)\n",
+                                "[A-Za-zÁÉÍÓÚÜñáéíóúüÑ\'\\.°0-9]{1,}([ ][A-Za-zÁÉÍÓÚÜñáéíóúüÑ\'\\.°0-9]{1,}){0,}\n",
+                                "[0-9]{1,}\n",
+                                "[0-9]{2}[/][0-9]{2}[/][0-9]{4}\n",
+                                "[0-9]{2}[/][0-9]{2}[/][0-9]{4}\n",
+                                "[A-Z]([^\n]*)\n",
+                                "[A-Z]([^\n]*)\n",
+                                "[0-9]{1,}"))
 
     """
     Muestra de DNI tarjeta generación 3 con teclado US:
@@ -154,24 +643,17 @@ class Document(object):
         
             00694683548@ARANDA@BRISA BEL{EN GABRIELA@F@41910327@D@21/06/1999@30/09/2022@271
 
+    La '{' no se repara (ver REPARACIONES): se conserva en los nombres, tanto seguida de la vocal (BEL{EN) como
+    sola (MART{N).
     """
-    dni_gen_tres_us = "".join(("[0-9]{1,}\"",
-                               "[A-Za-zÁÉÍÓÚÜñáéíóúüÑ{\']{1,}([\s][A-Za-zÁÉÍÓÚÜñáéíóúüÑ{\']{1,}){0,}\"",
-                               "[A-Za-zÁÉÍÓÚÜñáéíóúüÑ{\']{1,}([\s][A-Za-zÁÉÍÓÚÜñáéíóúüÑ{\']{1,}){0,}\"",
-                               "[A-Z]{1}\"",
-                               "[0-9]{7,9}\"",
-                               "[A-Z]{1}\"",
-                               "[0-9]{2}[-][0-9]{2}[-][0-9]{4}\"",
-                               "[0-9]{2}[-][0-9]{2}[-][0-9]{4}"))
-
-    dni_gen_tres_es = "".join(("[0-9]{1,}@",
-                               "[A-Za-zÁÉÍÓÚÜñáéíóúüÑ{\']{1,}([\s][A-Za-zÁÉÍÓÚÜñáéíóúüÑ{\']{1,}){0,}@",
-                               "[A-Za-zÁÉÍÓÚÜñáéíóúüÑ{\']{1,}([\s][A-Za-zÁÉÍÓÚÜñáéíóúüÑ{\']{1,}){0,}@",
-                               "[A-Z]{1}@",
-                               "[0-9]{7,9}@",
-                               "[A-Z]{1}@",
-                               "[0-9]{2}[/][0-9]{2}[/][0-9]{4}@",
-                               "[0-9]{2}[/][0-9]{2}[/][0-9]{4}"))
+    dni_gen_tres = "".join(("[0-9]{1,}@",
+                            "[A-Za-zÁÉÍÓÚÜñáéíóúüÑ{\']{1,}([ ][A-Za-zÁÉÍÓÚÜñáéíóúüÑ{\']{1,}){0,}@",
+                            "[A-Za-zÁÉÍÓÚÜñáéíóúüÑ{\']{1,}([ ][A-Za-zÁÉÍÓÚÜñáéíóúüÑ{\']{1,}){0,}@",
+                            "[A-Z]{1}@",
+                            "[0-9]{7,9}@",
+                            "[A-Z]{1}@",
+                            "[0-9]{2}[/][0-9]{2}[/][0-9]{4}@",
+                            "[0-9]{2}[/][0-9]{2}[/][0-9]{4}"))
 
     """
     Se presenta el caso de la falta del DNI y (parcial) del apellido al comenzar la lectura, para ciertas lecturas. 
@@ -187,21 +669,13 @@ class Document(object):
 
     """
 
-    dni_gen_tres_soft_us = "".join(("[A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}([\s][A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}){0,}\"",
-                                    "[A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}([\s][A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}){0,}\"",
-                                    "[A-Z]{1}\"",
-                                    "[0-9]{7,9}\"",
-                                    "[A-Z]{1}\"",
-                                    "[0-9]{2}[-][0-9]{2}[-][0-9]{4}\"",
-                                    "[0-9]{2}[-][0-9]{2}[-][0-9]{4}"))
-
-    dni_gen_tres_soft_es = "".join(("[A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}([\s][A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}){0,}@",
-                                    "[A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}([\s][A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}){0,}@",
-                                    "[A-Z]{1}@",
-                                    "[0-9]{7,9}@",
-                                    "[A-Z]{1}@",
-                                    "[0-9]{2}[/][0-9]{2}[/][0-9]{4}@",
-                                    "[0-9]{2}[/][0-9]{2}[/][0-9]{4}"))
+    dni_gen_tres_soft = "".join(("[A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}([ ][A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}){0,}@",
+                                 "[A-Za-zÁÉÍÓÚÜñáéíóúüÑ{\']{1,}([ ][A-Za-zÁÉÍÓÚÜñáéíóúüÑ{\']{1,}){0,}@",
+                                 "[A-Z]{1}@",
+                                 "[0-9]{7,9}@",
+                                 "[A-Z]{1}@",
+                                 "[0-9]{2}[/][0-9]{2}[/][0-9]{4}@",
+                                 "[0-9]{2}[/][0-9]{2}[/][0-9]{4}"))
 
     """
     Muestra de DNI tarjeta generación 2 con teclado US:
@@ -217,35 +691,20 @@ class Document(object):
         @11793518    @A@1@NIEVA@ANA MARIA@ARGENTINA@01/11/1955@F@05/11/2010@00025969635@2128 @05/11/2025@602@0@ILR:01.2 C:100817.01@UNIDAD #07 || S/N: 0040>2008>>0002
 
     """
-    dni_gen_dos_us = "".join(("^(:?(.*)\"|\")[0-9]{0,}(.*)\"",
-                              "[A-Z]{1}\"",
-                              "[0-9]{1}\"",
-                              "[A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}([\s][A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}){0,}\"",
-                              "[A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}([\s][A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}){0,}\"",
-                              "[A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}\"",
-                              "[0-9]{2}[-][0-9]{2}[-][0-9]{4}\"",
-                              "[A-Z]{1}\"",
-                              "[0-9]{2}[-][0-9]{2}[-][0-9]{4}\"",
-                              "[0-9]{10,}\"",
-                              "[0-9]{4,}[\s]{0,}\"",
-                              "[0-9]{2}[-][0-9]{2}[-][0-9]{4}\"",
-                              "[0-9]{1,}\"",
-                              "(.*)"))
-
-    dni_gen_dos_es = "".join(("^(:?(.*)\@|\@)[0-9]{0,}(.*)@",
-                              "[A-Z]{1}@",
-                              "[0-9]{1}\@",
-                              "[A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}([\s][A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}){0,}@",
-                              "[A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}([\s][A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}){0,}@",
-                              "[A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}@",
-                              "[0-9]{2}[/][0-9]{2}[/][0-9]{4}@",
-                              "[A-Z]{1}@",
-                              "[0-9]{2}[/][0-9]{2}[/][0-9]{4}@",
-                              "[0-9]{10,}@",
-                              "[0-9]{4,}[\s]{0,}@",
-                              "[0-9]{2}[/][0-9]{2}[/][0-9]{4}@",
-                              "[0-9]{1,}@",
-                              "(.*)"))
+    dni_gen_dos = "".join(("^(:?(.*)\\@|\\@)[0-9]{0,}(.*)@",
+                           "[A-Z]{1}@",
+                           "[0-9]{1}\\@",
+                           "[A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}([ ][A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}){0,}@",
+                           "[A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}([ ][A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}){0,}@",
+                           "[A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}@",
+                           "[0-9]{2}[/][0-9]{2}[/][0-9]{4}@",
+                           "[A-Z]{1}@",
+                           "[0-9]{2}[/][0-9]{2}[/][0-9]{4}@",
+                           "[0-9]{10,}@",
+                           "[0-9]{4,}[ ]{0,}@",
+                           "[0-9]{2}[/][0-9]{2}[/][0-9]{4}@",
+                           "[0-9]{1,}@",
+                           "(.*)"))
     """
     Muestra de DNI tarjeta generación 1 con teclado US:
 
@@ -256,33 +715,19 @@ class Document(object):
         @25307226    @A@1@VIVAS@ELIANA GUILLERMINA@ARGENTINA@07/04/1976@F@07/04/2010@00007595709@2128@1490@ILR:01.11 C:100328.01@UNIDAD ·12 || S/N: 0040>2008>>0014
 
     """
-    dni_gen_uno_us = "".join(("^(:?(.*)\"|\")[0-9]{0,}(.*)\"",
-                              "[A-Z]{1}\"",
-                              "[0-9]{1}\"",
-                              "[A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}([\s][A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}){0,}\"",
-                              "[A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}([\s][A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}){0,}\"",
-                              "[A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}\"",
-                              "[0-9]{2}[-][0-9]{2}[-][0-9]{4}\"",
-                              "[A-Z]{1}\"",
-                              "[0-9]{2}[-][0-9]{2}[-][0-9]{4}\"",
-                              "[0-9]{10,}\"",
-                              "[0-9]{4,}\"",
-                              "[0-9]{4,}\"",
-                              "(.*)"))
-
-    dni_gen_uno_es = "".join(("^(:?(.*)\@|\@)[0-9]{0,}(.*)@",
-                              "[A-Z]{1}@",
-                              "[0-9]{1}\@",
-                              "[A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}([\s][A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}){0,}@",
-                              "[A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}([\s][A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}){0,}@",
-                              "[A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}@",
-                              "[0-9]{2}[/][0-9]{2}[/][0-9]{4}@",
-                              "[A-Z]{1}@",
-                              "[0-9]{2}[/][0-9]{2}[/][0-9]{4}@",
-                              "[0-9]{10,}@",
-                              "[0-9]{4,}@",
-                              "[0-9]{4,}@",
-                              "(.*)"))
+    dni_gen_uno = "".join(("^(:?(.*)\\@|\\@)[0-9]{0,}(.*)@",
+                           "[A-Z]{1}@",
+                           "[0-9]{1}\\@",
+                           "[A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}([ ][A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}){0,}@",
+                           "[A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}([ ][A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}){0,}@",
+                           "[A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}@",
+                           "[0-9]{2}[/][0-9]{2}[/][0-9]{4}@",
+                           "[A-Z]{1}@",
+                           "[0-9]{2}[/][0-9]{2}[/][0-9]{4}@",
+                           "[0-9]{10,}@",
+                           "[0-9]{4,}@",
+                           "[0-9]{4,}@",
+                           "(.*)"))
     """
     Se presenta el caso de la falta del DNI al comenzar la lectura, para ciertas lecturas. Por eso se mantiene una versión 'soft' de la expresión regular
 
@@ -295,223 +740,430 @@ class Document(object):
         @A@1@VIVAS@ELIANA GUILLERMINA@ARGENTINA@07/04/1976@F@07/04/2010@00007595709@2128@1490@ILR:01.11 C:100328.01@UNIDAD ·12 || S/N: 0040>2008>>0014
 
     """
-    dni_gen_uno_soft_us = "".join(("^(:?(.*)\"|\")[A-Z]{1}\"",
-                                   "[0-9]{1}\"",
-                                   "[A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}([\s][A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}){0,}\"",
-                                   "[A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}([\s][A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}){0,}\"",
-                                   "[A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}\"",
-                                   "[0-9]{2}[-][0-9]{2}[-][0-9]{4}\"",
-                                   "[A-Z]{1}\"",
-                                   "[0-9]{2}[-][0-9]{2}[-][0-9]{4}\"",
-                                   "[0-9]{10,}\"",
-                                   "[0-9]{4,}\"",
-                                   "[0-9]{4,}\"",
-                                   "(.*)"))
-
-    dni_gen_uno_soft_es = "".join(("^(:?(.*)\@|\@)[A-Z]{1}@",
-                                   "[0-9]{1}\@",
-                                   "[A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}([\s][A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}){0,}@",
-                                   "[A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}([\s][A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}){0,}@",
-                                   "[A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}@",
-                                   "[0-9]{2}[/][0-9]{2}[/][0-9]{4}@",
-                                   "[A-Z]{1}@",
-                                   "[0-9]{2}[/][0-9]{2}[/][0-9]{4}@",
-                                   "[0-9]{10,}@",
-                                   "[0-9]{4,}@",
-                                   "[0-9]{4,}@",
-                                   "(.*)"))
-
-    def __init__(self, input_string):
-        # Es necesario reemplazar los espacios múltiples por espacios simples
-        input_string = sub("\s+", ' ', input_string)
+    dni_gen_uno_soft = "".join(("^(:?(.*)\\@|\\@)[A-Z]{1}@",
+                                "[0-9]{1}\\@",
+                                "[A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}([ ][A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}){0,}@",
+                                "[A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}([ ][A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}){0,}@",
+                                "[A-Za-zÁÉÍÓÚÜñáéíóúüÑ\']{1,}@",
+                                "[0-9]{2}[/][0-9]{2}[/][0-9]{4}@",
+                                "[A-Z]{1}@",
+                                "[0-9]{2}[/][0-9]{2}[/][0-9]{4}@",
+                                "[0-9]{10,}@",
+                                "[0-9]{4,}@",
+                                "[0-9]{4,}@",
+                                "(.*)"))
+
+    # Nombres de las REPARACIONES aplicadas a la lectura. Sólo se asigna en la instancia si se aplicó alguna, por lo
+    # que to_dict y DocumentRecord informan None si no se aplicó ninguna
+    reparaciones = ()
+
+    def __init__(self, input_string, modo=ModoLectura.REGEX, orden=None):
+        self._leer(input_string, modo, orden)
+
+    def _leer(self, input_string, modo, orden=None, formatos=None, observadores=()):
+        """
+        Procesa la lectura sobre la instancia. Retorna None si algún formato coincidió, o el MotivoRechazo.
+        formatos son los formatos habilitados sin orden (None, Document._formatos) y observadores, los que se
+        notifican además de los registrados con agregar_observador
+        """
+        if not _observadores and not observadores:
+            return self._leer_formatos(input_string, modo, None, orden, formatos)[1]
+        intentos = []
+        inicio = perf_counter()
+        formato, motivo = self._leer_formatos(input_string, modo, intentos, orden, formatos)
+        segundos = perf_counter() - inicio
+        for observador in tuple(_observadores) + observadores:
+            observador(self, formato, motivo, intentos, segundos)
+        return motivo
+
+    def _leer_formatos(self, input_string, modo, intentos, orden, formatos=None):
+        """
+        Implementación de _leer. Retorna (Formato que coincidió, None) o (None, MotivoRechazo). Si intentos es una
+        lista, se le agrega (Formato, segundos) por cada formato intentado
+        """
         self.teclado = None
         self.tipo_documento = None
-        self.muestra = input_string.strip()
-        if search(self.carnet_conductor_us, self.muestra) and len(self.muestra.split("\n")) == 19:
-            self.teclado = "US"
-            self.tipo_documento = TipoDocumento.CONDUCTOR
-            values = self.muestra.split("\n")
-            self.dni = values[1]
-            self.sexo = values[2]
-            self.nombres = values[3]
-            self.apellidos = values[4]
-            self.fecha_nacimiento = values[5]
-            self.pais = values[6]
-            self.direccion_calle = values[7]
-            self.direccion_numero = values[8]
-            self.direccion_piso = values[9]
-            self.direccion_depto = values[10]
-            self.direccion_barrio = values[11]
-            self.ciudad = values[12]
-            self.codigo_postal = values[13]
-            self.fecha_emision_documento = values[14]
-            self.fecha_vencimiento_documento = values[15]
-            self.carnet_conductor_categoria = values[16]
-            self.grupo_factor_sanguineo = values[17]
-            self.numero_tramite = values[18]
-        elif search(self.carnet_conductor_es, self.muestra) and len(self.muestra.split("\n")) == 19:
-            self.teclado = "ES"
-            self.tipo_documento = TipoDocumento.CONDUCTOR
-            values = self.muestra.split("\n")
-            self.dni = values[1]
-            self.sexo = values[2]
-            self.nombres = values[3]
-            self.apellidos = values[4]
-            self.fecha_nacimiento = values[5]
-            self.pais = values[6]
-            self.direccion_calle = values[7]
-            self.direccion_numero = values[8]
-            self.direccion_piso = values[9]
-            self.direccion_depto = values[10]
-            self.direccion_barrio = values[11]
-            self.ciudad = values[12]
-            self.codigo_postal = values[13]
-            self.fecha_emision_documento = values[14]
-            self.fecha_vencimiento_documento = values[15]
-            self.carnet_conductor_categoria = values[16]
-            self.grupo_factor_sanguineo = values[17]
-            self.numero_tramite = values[18]
-        elif search(self.dni_gen_tres_us, self.muestra) and len(self.muestra.split("\"")) >= 8:
-            self.teclado = "US"
-            self.tipo_documento = TipoDocumento.DNI_GEN_3
-            values = self.muestra.split("\"")
-            self.numero_tramite = values[0]
-            self.apellidos = values[1]
-            self.nombres = values[2]
-            self.sexo = values[3]
-            self.dni = values[4]
-            self.ejemplar = values[5]
-            self.fecha_nacimiento = values[6]
-            self.fecha_emision_documento = values[7]
-        elif search(self.dni_gen_tres_es, self.muestra) and len(self.muestra.split("@")) >= 8:
-            self.teclado = "ES"
-            self.tipo_documento = TipoDocumento.DNI_GEN_3
-            values = self.muestra.split("@")
-            self.numero_tramite = values[0]
-            self.apellidos = values[1]
-            self.nombres = values[2]
-            self.sexo = values[3]
-            self.dni = values[4]
-            self.ejemplar = values[5]
-            self.fecha_nacimiento = values[6]
-            self.fecha_emision_documento = values[7]
-        elif search(self.dni_gen_tres_soft_us, self.muestra) and len(self.muestra.split("\"")) >= 8:
-            self.teclado = "US"
-            self.tipo_documento = TipoDocumento.DNI_GEN_3
-            values = self.muestra.split("\"")
-            self.ejemplar = None
-            self.apellidos = None
-            self.nombres = values[1]
-            self.sexo = values[2]
-            self.dni = values[3]
-            self.ejemplar = values[4]
-            self.fecha_nacimiento = values[5]
-            self.fecha_emision_documento = values[6]
-            self.fecha_emision_documento = values[7]
-        elif search(self.dni_gen_tres_soft_es, self.muestra) and len(self.muestra.split("@")) >= 8:
-            self.teclado = "ES"
-            self.tipo_documento = TipoDocumento.DNI_GEN_3
-            values = self.muestra.split("@")
-            self.ejemplar = None
-            self.apellidos = None
-            self.nombres = values[1]
-            self.sexo = values[2]
-            self.dni = values[3]
-            self.ejemplar = values[4]
-            self.fecha_nacimiento = values[5]
-            self.fecha_emision_documento = values[6]
-        elif search(self.dni_gen_dos_us, self.muestra) and len(self.muestra.split("\"")) >= 17:
-            self.teclado = "US"
-            self.tipo_documento = TipoDocumento.DNI_GEN_2
-            values = self.muestra.split("\"")
-            self.dni = values[1].strip()
-            self.ejemplar = values[2]
-            self.apellidos = values[4]
-            self.nombres = values[5]
-            self.pais = values[6]
-            self.fecha_nacimiento = values[7]
-            self.sexo = values[8]
-            self.fecha_emision_documento = values[9]
-            self.numero_tramite = values[10]
-            self.of_ident = values[11]
-            self.fecha_vencimiento_documento = values[12]
-        elif search(self.dni_gen_dos_es, self.muestra) and len(self.muestra.split("@")) >= 17:
-            self.teclado = "ES"
-            self.tipo_documento = TipoDocumento.DNI_GEN_2
-            values = self.muestra.split("@")
-            self.dni = values[1].strip()
-            self.ejemplar = values[2]
-            self.apellidos = values[4]
-            self.nombres = values[5]
-            self.pais = values[6]
-            self.fecha_nacimiento = values[7]
-            self.sexo = values[8]
-            self.fecha_emision_documento = values[9]
-            self.numero_tramite = values[10]
-            self.of_ident = values[11]
-            self.fecha_vencimiento_documento = values[12]
-        elif search(self.dni_gen_uno_us, self.muestra) and len(self.muestra.split("\"")) >= 15:
-            self.teclado = "US"
-            self.tipo_documento = TipoDocumento.DNI_GEN_1
-            values = self.muestra.split("\"")
-            self.dni = values[1].strip()
-            self.ejemplar = values[2]
-            self.apellidos = values[4]
-            self.nombres = values[5]
-            self.pais = values[6]
-            self.fecha_nacimiento = values[7]
-            self.sexo = values[8]
-            self.fecha_emision_documento = values[9]
-            self.numero_tramite = values[10]
-            self.of_ident = values[11]
-        elif search(self.dni_gen_uno_es, self.muestra) and len(self.muestra.split("@")) >= 15:
-            self.teclado = "ES"
-            self.tipo_documento = TipoDocumento.DNI_GEN_1
-            values = self.muestra.split("@")
-            self.dni = values[1].strip()
-            self.ejemplar = values[2]
-            self.apellidos = values[4]
-            self.nombres = values[5]
-            self.pais = values[6]
-            self.fecha_nacimiento = values[7]
-            self.sexo = values[8]
-            self.fecha_emision_documento = values[9]
-            self.numero_tramite = values[10]
-            self.of_ident = values[11]
-        elif search(self.dni_gen_uno_soft_us, self.muestra) and len(self.muestra.split("\"")) >= 14:
-            self.teclado = "US"
-            self.tipo_documento = TipoDocumento.DNI_GEN_1
-            values = self.muestra.split("\"")
-            # Establecido DNI específicamente a None, ya que es un valor de consulta recurrente
-            self.dni = None
-            self.ejemplar = values[1]
-            self.apellidos = values[3]
-            self.nombres = values[4]
-            self.pais = values[5]
-            self.fecha_nacimiento = values[6]
-            self.sexo = values[7]
-            self.fecha_emision_documento = values[8]
-            self.numero_tramite = values[9]
-            self.of_ident = values[10]
-        elif search(self.dni_gen_uno_soft_es, self.muestra) and len(self.muestra.split("@")) >= 14:
-            self.teclado = "ES"
-            self.tipo_documento = TipoDocumento.DNI_GEN_1
-            values = self.muestra.split("@")
-            self.dni = None
-            self.ejemplar = values[1]
-            self.apellidos = values[3]
-            self.nombres = values[4]
-            self.pais = values[5]
-            self.fecha_nacimiento = values[6]
-            self.sexo = values[7]
-            self.fecha_emision_documento = values[8]
-            self.numero_tramite = values[9]
-            self.of_ident = values[10]
+        self.muestra = normalizar(input_string)
+        reparada, reparaciones = reparar(self.muestra)
+        if reparaciones:
+            self.reparaciones = reparaciones
+        teclado, canonica = _canonizar(reparada)
+        if orden is not None:
+            formatos, atrasados = orden._evaluacion
+        elif formatos is None:
+            formatos = self._formatos
+        candidatos = self._candidatos(canonica, formatos)
+        # Con orden, en modo REGEX los formatos después del primero se intentan sólo si coincide su guardia
+        guardias = orden is not None and modo is ModoLectura.REGEX
+        # En modo TOKENS la muestra se parte una única vez por cada separador
+        partes = {}
+        for posicion, formato in enumerate(candidatos):
+            if guardias and posicion and not self._puede_coincidir(formato, None, canonica, modo):
+                continue
+            if not self._coincide(formato, canonica, modo, partes, intentos):
+                continue
+            if orden is not None:
+                # Si entre los candidatos restantes no hay formatos que precedan a formato en el orden histórico,
+                # el resultado ya es el histórico
+                anteriores = atrasados[formato.nombre]
+                if anteriores:
+                    anteriores = [anterior for anterior in candidatos[posicion + 1:] if anterior.nombre in anteriores]
+                    if anteriores:
+                        formato = self._primero_historico(formato, anteriores, canonica, modo, partes, intentos)
+                if orden.perfil is None:
+                    orden.registrar(formato)
+            self.teclado = teclado
+            self.tipo_documento = formato.tipo_documento
+            # Los valores se toman de la lectura reparada, partida por el separador del teclado detectado. Con
+            # teclado ES la muestra canónica es la reparada, y se reutilizan las partes del modo TOKENS
+            if teclado == "US":
+                values = reparada.split(intercambiar_teclado(formato.separador))
+            else:
+                values = partes.get(formato.separador) or reparada.split(formato.separador)
+            formato.extraer(self, values)
+            return formato, None
+        if not self.muestra:
+            return None, MotivoRechazo.VACIA
+        return None, MotivoRechazo.SIN_COINCIDENCIA if candidatos else MotivoRechazo.SIN_ESTRUCTURA
+
+    @staticmethod
+    def _coincide(formato, canonica, modo, partes, intentos):
+        if intentos is not None:
+            inicio = perf_counter()
+        if modo is ModoLectura.TOKENS:
+            values = partes.get(formato.separador)
+            if values is None:
+                values = partes[formato.separador] = canonica.split(formato.separador)
+            coincide = all(valida(values[indice]) for indice, valida in formato.campos)
+        else:
+            coincide = formato.patron.search(canonica) is not None
+        if intentos is not None:
+            intentos.append((formato, perf_counter() - inicio))
+        return coincide
+
+    @staticmethod
+    def _puede_coincidir(formato, coincidente, canonica, modo):
+        """
+        Chequeo barato de si formato puede coincidir con la lectura, sabiendo que coincidente (si no es None) coincide.
+        Un resultado True no asegura la coincidencia
+        """
+        if modo is ModoLectura.TOKENS:
+            return coincidente is None or (formato.nombre, coincidente.nombre) not in _EXCLUSIVOS_TOKENS
+        return formato.guardia is None or formato.guardia.search(canonica) is not None
+
+    @classmethod
+    def _primero_historico(cls, formato, anteriores, canonica, modo, partes, intentos):
+        """
+        Con un orden distinto del histórico, retorna el formato que hubiera coincidido en el orden histórico: el
+        primero de anteriores, los candidatos sin intentar que preceden a formato en ese orden, que coincide, o formato
+        """
+        anteriores = [anterior for anterior in anteriores if cls._puede_coincidir(anterior, formato, canonica, modo)]
+        if not anteriores:
+            return formato
+        for anterior in sorted(anteriores, key=lambda anterior: cls._posiciones[anterior.nombre]):
+            if cls._coincide(anterior, canonica, modo, partes, intentos):
+                return anterior
+        return formato
+
+    @classmethod
+    def parse_many(cls, lecturas, modo=ModoLectura.REGEX, rechazos=True, orden=None):
+        """
+        Generador que procesa de forma perezosa cualquier iterable de lecturas (líneas de un archivo, filas de
+        una consulta, etc.) sin armar la lista completa en memoria. Por cada lectura retorna una Lectura con el
+        documento procesado, o con el motivo de rechazo si ningún formato coincidió (salvo rechazos=False).
+        Los patrones compilados y la tabla de formatos se reutilizan entre lecturas. orden es un OrdenFormatos
+        opcional.
+        """
+        crear = cls.__new__
+        leer = cls._leer
+        for numero, entrada in enumerate(lecturas, 1):
+            documento = crear(cls)
+            motivo = leer(documento, entrada, modo, orden)
+            if motivo is None:
+                yield Lectura(numero, entrada, documento, None)
+            elif rechazos:
+                yield Lectura(numero, entrada, None, motivo)
+
+    @staticmethod
+    def _candidatos(muestra, formatos):
+        """
+        Clasificador de una sola pasada: mira una vez las características baratas de la muestra (separadores
+        presentes y su cantidad, prefijo y caracter de fecha) y devuelve, en el orden de formatos, sólo los
+        formatos que la muestra puede llegar a cumplir. Cada condición es necesaria para que el patrón
+        correspondiente coincida, por lo que el resultado es el mismo que recorrer todos los patrones en cascada.
+        """
+        separadores = {"\n": muestra.count("\n"), "@": muestra.count("@")}
+        return [formato for formato in formatos
+                if formato.minimo <= separadores[formato.separador] + 1 <= formato.maximo
+                and formato.fecha in muestra and muestra.startswith(formato.prefijo)]
+
+    """
+    Guardias de los formatos: la parte de cada patrón que sólo admite una forma de coincidir, desde el sexo o
+    ejemplar hasta las fechas del documento
+    """
+    _guardia_gen_tres = compile_pattern("@[A-Z]@[0-9]{7,9}@[A-Z]@[0-9]{2}/[0-9]{2}/[0-9]{4}@[0-9]{2}/[0-9]{2}/[0-9]{4}")
+    _guardia_gen_dos = compile_pattern("@[0-9]{2}/[0-9]{2}/[0-9]{4}@[A-Z]@[0-9]{2}/[0-9]{2}/[0-9]{4}@[0-9]{10,}@"
+                                       "[0-9]{4,}[ ]{0,}@[0-9]{2}/[0-9]{2}/[0-9]{4}@[0-9]{1,}@")
+    _guardia_gen_uno = compile_pattern("@[0-9]{2}/[0-9]{2}/[0-9]{4}@[A-Z]@[0-9]{2}/[0-9]{2}/[0-9]{4}@[0-9]{10,}@"
+                                       "[0-9]{4,}@[0-9]{4,}@")
+
+    """
+    Formatos en el orden histórico de evaluación, declarados por sus campos (ver declarar_formato) con los patrones
+    de arriba, compilados una única vez al importar. Se agregan formatos con registrar_formato
+    """
+    _formatos = (
+        declarar_formato("carnet_conductor", TipoDocumento.CONDUCTOR, "\n", _CAMPOS_CONDUCTOR, prefijo="DNI\n",
+                         fecha="/", patrones=(carnet_conductor,))
+        + declarar_formato("dni_gen_tres", TipoDocumento.DNI_GEN_3, "@",
+                           (CampoFormato("numero_tramite", _TERMINA_EN_CIFRA), CampoFormato("apellidos", _NOMBRE_LLAVE))
+                           + _CAMPOS_GEN_TRES,
+                           abierto=True, fecha="/", guardia=_guardia_gen_tres, patrones=(dni_gen_tres,))
+        + declarar_formato("dni_gen_tres_soft", TipoDocumento.DNI_GEN_3, "@",
+                           # Sólo se reconoce seguida del campo desconocido final
+                           (CampoFormato("apellidos", _TERMINA_EN_LETRA, truncado=True),) + _CAMPOS_GEN_TRES
+                           + (CampoFormato(),),
+                           abierto=True, fecha="/", guardia=_guardia_gen_tres, patrones=(dni_gen_tres_soft,))
+        + declarar_formato("dni_gen_dos", TipoDocumento.DNI_GEN_2, "@",
+                           (CampoFormato(), _DNI_GEN_UNO_DOS) + _CAMPOS_GEN_UNO_DOS
+                           + (CampoFormato("of_ident", _CIFRAS_RELLENO), CampoFormato("fecha_vencimiento_documento",
+                                                                                     FECHA),
+                              CampoFormato(tipo=CIFRAS), CampoFormato(), CampoFormato(), CampoFormato()),
+                           abierto=True, fecha="/", guardia=_guardia_gen_dos, patrones=(dni_gen_dos,))
+        # Algunas lecturas no traen el DNI: la versión 'soft' lo informa en None, ya que es un valor de consulta
+        # recurrente
+        + declarar_formato("dni_gen_uno", TipoDocumento.DNI_GEN_1, "@",
+                           (CampoFormato(), _DNI_GEN_UNO_DOS._replace(opcional=True)) + _CAMPOS_GEN_UNO_DOS
+                           + (CampoFormato("of_ident", cifras(4)), CampoFormato(tipo=cifras(4)), CampoFormato(),
+                              CampoFormato()),
+                           abierto=True, fecha="/", guardia=_guardia_gen_uno,
+                           patrones=(dni_gen_uno, dni_gen_uno_soft))
+    )
+    _posiciones = dict((formato.nombre, posicion) for posicion, formato in enumerate(_formatos))
+
+    def to_record(self):
+        """
+        Retorna el DocumentRecord equivalente
+        """
+        return DocumentRecord.from_document(self)
+
+    def to_dict(self):
+        """
+        Retorna un diccionario con todos los CAMPOS, en None los que el formato leído no informa, y tipo_documento
+        como su texto, listo para serializar
+        """
+        valores = vars(self)
+        resultado = {campo: valores.get(campo) for campo in CAMPOS}
+        if resultado["tipo_documento"] is not None:
+            resultado["tipo_documento"] = resultado["tipo_documento"].value
+        return resultado
 
     def __str__(self):
-        return "\n".join(("Nombre: " + self.nombres,
-                          "Apellido: " + (self.apellidos if self.apellidos else "-"),
-                          "Documento: " + (self.dni if self.dni else "-"),
-                          "Fecha nacimiento: " + self.fecha_nacimiento,
-                          "Sexo: " + self.sexo,
-                          "Tipo documento: " + self.tipo_documento.value))
+        # Los documentos rechazados y los formatos 'soft' no informan todos los campos
+        valores = vars(self)
+        return "\n".join(("Nombre: " + (valores.get("nombres") or "-"),
+                          "Apellido: " + (valores.get("apellidos") or "-"),
+                          "Documento: " + (valores.get("dni") or "-"),
+                          "Fecha nacimiento: " + (valores.get("fecha_nacimiento") or "-"),
+                          "Sexo: " + (valores.get("sexo") or "-"),
+                          "Tipo documento: " + (self.tipo_documento.value if self.tipo_documento else "-")))
+
+
+def registrar_formato(nombre, tipo_documento, separador, campos, abierto=False, prefijo="", fecha=""):
+    """
+    Agrega al final del orden histórico el formato declarado por campos (ver declarar_formato), y su versión 'soft'
+    si tiene campos opcionales, y retorna la tupla de Formato agregados. Se intentan después de los existentes, por
+    lo que no cambian el resultado de las lecturas que ya se reconocían, y Document._candidatos los descarta sin
+    aplicar su patrón en las lecturas con otro separador, cantidad de campos o prefijo. tipo_documento puede ser un
+    miembro de cualquier Enum.
+
+    Pensado para la configuración al iniciar: los OrdenFormatos creados antes no incluyen los formatos agregados.
+    Lanza ValueError si el nombre ya está registrado
+    """
+    formatos = declarar_formato(nombre, tipo_documento, separador, campos, abierto, prefijo, fecha)
+    repetidos = [formato.nombre for formato in formatos if formato.nombre in Document._posiciones]
+    if repetidos:
+        raise ValueError("Formatos ya registrados: " + ", ".join(repetidos))
+    todos = Document._formatos + formatos
+    Document._posiciones = dict((formato.nombre, posicion) for posicion, formato in enumerate(todos))
+    Document._formatos = todos
+    return formatos
+
+
+def formatos_habilitados(nombres=None):
+    """
+    Retorna la tupla de los Formato de nombres (None, todos los registrados) en el orden histórico. Lanza ValueError
+    si algún nombre no es de un formato registrado, o si se habilita una versión 'soft' sin su versión completa: los
+    patrones 'soft' no están anclados al comienzo de la lectura y, sin intentar antes la versión completa, en modo
+    REGEX coinciden desplazados con una lectura completa
+    """
+    if nombres is None:
+        return Document._formatos
+    desconocidos = [nombre for nombre in nombres if nombre not in Document._posiciones]
+    if desconocidos:
+        raise ValueError("Formatos desconocidos: " + ", ".join(desconocidos))
+    habilitados = set(nombres)
+    sin_completo = [nombre for nombre in nombres if nombre.endswith("_soft")
+                    and nombre[:-len("_soft")] in Document._posiciones and nombre[:-len("_soft")] not in habilitados]
+    if sin_completo:
+        raise ValueError("Formatos 'soft' sin su versión completa: " + ", ".join(sin_completo))
+    return tuple(formato for formato in Document._formatos if formato.nombre in habilitados)
+
+
+class OrdenFormatos(object):
+    """
+    Orden de evaluación de los formatos, para el parámetro orden de Document, Document.parse_many e iter_documents.
+    Con perfil, una secuencia de nombres de formato (ver Formato.nombre) por orden de prioridad, el orden es fijo,
+    como configuración de un sitio con tráfico conocido; los formatos no incluidos siguen en el orden histórico.
+    Sin perfil, se cuentan las coincidencias de cada formato y cada intervalo lecturas reconocidas se reordenan por
+    frecuencia; con perfil no se cuenta nada.
+
+    Sólo mejora el tráfico de DNI generación 1 y 2 en modo REGEX, cuyos patrones son los más costosos y se intentan
+    al final del orden histórico (ver benchmark_reader orden). Con tráfico de DNI generación 3, que ya se intenta
+    primero, o en modo TOKENS, el costo de llevar el orden no se recupera y la lectura es algo más lenta que sin
+    orden.
+
+    El resultado de cada lectura es siempre el del orden histórico: cuando coincide un formato adelantado, se
+    intentan antes los formatos que lo preceden en el orden histórico y no se intentaron, salvo los incompatibles
+    con él (modo TOKENS) o cuya guardia no coincide (modo REGEX). Si ninguno de esos formatos es candidato para la
+    lectura (ver Document._candidatos), como cuando coincide el primero del orden histórico, no se intenta nada más.
+    El primer formato del orden se intenta directamente; los siguientes, en modo REGEX, sólo si coincide su guardia.
+
+    formatos son los nombres de los formatos habilitados (None, todos); los demás no se intentan.
+
+    Puede compartirse entre hilos. Los contadores no usan lock, por lo que pueden perder alguna coincidencia
+    concurrente, lo que sólo afecta el orden y nunca el resultado.
+    """
+
+    def __init__(self, perfil=None, intervalo=1000, formatos=None):
+        self._habilitados = formatos_habilitados(formatos)
+        nombres = set(formato.nombre for formato in self._habilitados)
+        desconocidos = [nombre for nombre in perfil or () if nombre not in nombres]
+        if desconocidos:
+            raise ValueError("Formatos desconocidos: " + ", ".join(desconocidos))
+        self.perfil = tuple(perfil) if perfil is not None else None
+        self.intervalo = intervalo
+        self.coincidencias = dict.fromkeys(nombres, 0)
+        self._restantes = intervalo
+        if self.perfil is None:
+            self._ordenar(self._habilitados)
+        else:
+            prioridad = dict((nombre, posicion) for posicion, nombre in enumerate(self.perfil))
+            self._ordenar(sorted(self._habilitados, key=lambda formato: prioridad.get(formato.nombre, len(prioridad))))
+
+    def _ordenar(self, formatos):
+        """
+        Fija el orden de evaluación junto con los nombres de los formatos que cada formato precede en este orden y
+        lo preceden en el orden histórico, en una única asignación para que los hilos no vean uno sin el otro
+        """
+        posiciones = Document._posiciones
+        formatos = tuple(formatos)
+        self._evaluacion = (formatos, dict(
+            (formato.nombre, frozenset(posterior.nombre for posterior in formatos[posicion + 1:]
+                                       if posiciones[posterior.nombre] < posiciones[formato.nombre]))
+            for posicion, formato in enumerate(formatos)))
+
+    def registrar(self, formato):
+        """Cuenta la coincidencia de formato, y cada intervalo coincidencias reordena los formatos. Sólo sin perfil"""
+        self.coincidencias[formato.nombre] += 1
+        self._restantes -= 1
+        if self._restantes <= 0:
+            self._restantes = self.intervalo
+            # sorted es estable: a igual frecuencia se conserva el orden histórico
+            self._ordenar(sorted(self._habilitados, key=lambda formato: -self.coincidencias[formato.nombre]))
+
+    @property
+    def formatos(self):
+        return self._evaluacion[0]
+
+    @property
+    def nombres(self):
+        return tuple(formato.nombre for formato in self.formatos)
+
+
+class DocumentRecord(CamposTipados, namedtuple("DocumentRecord", CAMPOS, defaults=(None,) * len(CAMPOS))):
+    """
+    Registro inmutable de esquema fijo con los datos de un Document, pensado para mantener en memoria lotes
+    grandes: no tiene __dict__, los campos que el formato leído no informa quedan en None, y los valores de
+    CAMPOS_INTERNADOS se internan para que todos los registros compartan la misma cadena.
+    """
+    __slots__ = ()
+
+    _internados = tuple(campo in CAMPOS_INTERNADOS for campo in CAMPOS)
+
+    @classmethod
+    def from_document(cls, documento, internar=True):
+        """
+        Retorna el DocumentRecord del Document. Con internar False no se internan los CAMPOS_INTERNADOS, lo que
+        cuesta varias veces menos, para registros que no se acumulan en memoria
+        """
+        valores = vars(documento)
+        if not internar:
+            return cls._make(map(valores.get, CAMPOS))
+        return cls._make(intern(valor) if internado and valor.__class__ is str else valor
+                         for valor, internado in zip(map(valores.get, CAMPOS), cls._internados))
+
+    def to_dict(self):
+        """
+        Retorna un diccionario con todos los CAMPOS y tipo_documento como su texto, como Document.to_dict
+        """
+        resultado = dict(zip(CAMPOS, self))
+        if self.tipo_documento is not None:
+            resultado["tipo_documento"] = self.tipo_documento.value
+        return resultado
+
+
+def iter_documents(lecturas, modo=ModoLectura.REGEX, rechazos=True, orden=None):
+    """
+    Equivalente a Document.parse_many(lecturas, modo, rechazos, orden)
+    """
+    return Document.parse_many(lecturas, modo, rechazos, orden)
+
+
+class DocumentParser(object):
+    """
+    Procesador de lecturas configurado una vez y seguro para compartir entre hilos, pensado para backends que
+    verifican lecturas desde varios hilos a la vez:
+
+        modo: ModoLectura
+        formatos: nombres de los formatos habilitados (None, todos los registrados al crearlo; una versión 'soft'
+            requiere su versión completa, ver formatos_habilitados); con orden, los habilitados son los de orden
+        orden: OrdenFormatos opcional
+        cache: DocumentCache opcional, de uso exclusivo de este procesador
+        metricas: observador opcional (por ejemplo Metricas, sin instalar) que registra sólo las lecturas que procesa
+            este procesador; los aciertos de la cache no se procesan y se cuentan en la cache
+        codificacion: codificación de las lecturas recibidas como bytes
+
+    Después de crearlo su estado es de sólo lectura: los formatos compilados se toman al crearlo y parse no guarda
+    nada en el procesador, por lo que es reentrante. La cache, las métricas y el orden son seguros entre hilos por
+    sí mismos.
+    """
+
+    def __init__(self, modo=ModoLectura.REGEX, formatos=None, orden=None, cache=None, metricas=None,
+                 codificacion="utf-8"):
+        if orden is not None and formatos is not None:
+            raise ValueError("Con orden, los formatos habilitados se indican en OrdenFormatos")
+        self.modo = modo
+        self.formatos = formatos_habilitados(formatos) if orden is None else orden._habilitados
+        self.orden = orden
+        self.cache = cache
+        self.metricas = metricas
+        self.codificacion = codificacion
+        self._observadores = (metricas,) if metricas is not None else ()
+
+    def parse(self, lectura):
+        """
+        Retorna el DocumentRecord de la lectura: str, o bytes, bytearray o memoryview en codificacion, que se
+        decodifican directamente sobre el buffer recibido (los bytes inválidos se reemplazan). Una lectura rechazada
+        da un DocumentRecord con tipo_documento None
+        """
+        if lectura.__class__ is not str:
+            lectura = str(lectura, self.codificacion, "replace")
+        if self.cache is not None:
+            return self.cache.leer(lectura, self._procesar)
+        return self._procesar(lectura)
+
+    def _procesar(self, lectura):
+        documento = Document.__new__(Document)
+        documento._leer(lectura, self.modo, self.orden, self.formatos, self._observadores)
+        # Los registros de una cache se acumulan en memoria y se internan; los demás se descartan tras cada consulta
+        return DocumentRecord.from_document(documento, internar=self.cache is not None)
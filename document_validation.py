@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""
+Validación y enriquecimiento de lotes de documentos procesados: CUIL de cada documento y problemas de sus datos
+(DNI mal formado, fechas inexistentes o imposibles).
+
+    from document_export import LoteColumnar
+    from document_validation import Problema, validar_lote
+
+    lote = LoteColumnar(lectura.documento for lectura in iter_documents(lecturas))
+    resultado = validar_lote(lote)
+    for cuil, problemas in zip(resultado["cuil"], resultado["problemas"]):
+        if problemas & Problema.NACIMIENTO_FUTURO:
+            ...
+
+El lote se procesa por columnas con operaciones vectorizadas de NumPy si está instalado; si no, documento por
+documento. Ambos caminos dan exactamente el mismo resultado.
+"""
+from datetime import date
+from enum import IntFlag
+
+from document_reader import convertir_fecha
+
+# Prefijo del CUIL por sexo. El sexo X no tiene un prefijo propio: se asigna al tramitar el CUIL y no se puede derivar
+PREFIJOS_CUIL = {"M": 20, "F": 27}
+# Prefijo cuando el dígito verificador con el prefijo del sexo sería 10
+PREFIJO_CUIL_ALTERNATIVO = 23
+_PESOS_CUIL = (5, 4, 3, 2, 7, 6, 5, 4, 3, 2)
+
+_CIFRAS = "0123456789"
+# Posiciones de las cifras en una fecha 'dd/mm/aaaa'
+_CIFRAS_FECHA = (0, 1, 3, 4, 6, 7, 8, 9)
+_DIAS_MES = (0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+_FECHAS = ("fecha_nacimiento", "fecha_emision_documento", "fecha_vencimiento_documento")
+
+
+class Problema(IntFlag):
+    DNI_INVALIDO = 1
+    FECHA_INVALIDA = 2
+    NACIMIENTO_FUTURO = 4
+    VENCIMIENTO_ANTERIOR_EMISION = 8
+    EMISION_ANTERIOR_NACIMIENTO = 16
+
+
+def _es_dni(dni):
+    """Un DNI válido tiene 7 u 8 cifras"""
+    return 7 <= len(dni) <= 8 and not dni.strip(_CIFRAS)
+
+
+def calcular_cuil(dni, sexo):
+    """
+    Retorna el CUIL (11 cifras, sin guiones) derivado del DNI y el sexo ('M' o 'F'), o None si el DNI no es válido
+    o el sexo no permite derivarlo
+    """
+    prefijo = PREFIJOS_CUIL.get(sexo)
+    if prefijo is None or dni is None or not _es_dni(dni):
+        return None
+    digito = _digito_cuil("%02d%08d" % (prefijo, int(dni)))
+    if digito == 10:
+        prefijo = PREFIJO_CUIL_ALTERNATIVO
+        digito = _digito_cuil("%02d%08d" % (prefijo, int(dni)))
+    return "%02d%08d%d" % (prefijo, int(dni), digito)
+
+
+def _digito_cuil(cifras):
+    return (11 - sum(int(cifra) * peso for cifra, peso in zip(cifras, _PESOS_CUIL)) % 11) % 11
+
+
+def _fecha_entera(texto):
+    """Retorna la fecha aaaammdd de una fecha 'dd/mm/aaaa' o 'dd-mm-aaaa', 0 si no es una fecha válida o None"""
+    if texto is None:
+        return None
+    if (len(texto) != 10 or texto[2] not in "/-" or texto[5] != texto[2]
+            or "".join(texto[indice] for indice in _CIFRAS_FECHA).strip(_CIFRAS)):
+        return 0
+    fecha = convertir_fecha(texto)
+    return 0 if fecha is None else fecha.year * 10000 + fecha.month * 100 + fecha.day
+
+
+def validar_lote(lote, hoy=None, vectorizado=None):
+    """
+    Retorna {"cuil": lista de CUIL o None, "problemas": lista de Problema combinados como enteros (0, ninguno)},
+    en el orden de los documentos del lote (LoteColumnar, o diccionario de columnas de texto con al menos dni,
+    sexo y las fechas). Los campos ausentes no se consideran un problema.
+
+    hoy es la fecha contra la que se controla el nacimiento (por defecto, la actual). Con vectorizado None se usa
+    NumPy si está instalado; True lo requiere y False procesa documento por documento
+    """
+    hoy = hoy or date.today()
+    hoy = hoy.year * 10000 + hoy.month * 100 + hoy.day
+    if vectorizado is not False:
+        try:
+            import numpy
+        except ImportError:
+            if vectorizado:
+                raise
+        else:
+            return _validar_numpy(numpy, lote, hoy)
+    return _validar_python(lote, hoy)
+
+
+def _validar_python(lote, hoy):
+    cuiles = []
+    problemas = []
+    fechas = zip(*(map(_fecha_entera, lote[campo]) for campo in _FECHAS))
+    for dni, sexo, (nacimiento, emision, vencimiento) in zip(lote["dni"], lote["sexo"], fechas):
+        cuiles.append(calcular_cuil(dni, sexo))
+        problema = Problema.DNI_INVALIDO if dni is not None and not _es_dni(dni) else 0
+        if 0 in (nacimiento, emision, vencimiento):
+            problema |= Problema.FECHA_INVALIDA
+        if nacimiento and nacimiento > hoy:
+            problema |= Problema.NACIMIENTO_FUTURO
+        if emision and vencimiento and vencimiento < emision:
+            problema |= Problema.VENCIMIENTO_ANTERIOR_EMISION
+        if nacimiento and emision and emision < nacimiento:
+            problema |= Problema.EMISION_ANTERIOR_NACIMIENTO
+        problemas.append(int(problema))
+    return {"cuil": cuiles, "problemas": problemas}
+
+
+def _codigos(numpy, columna, ancho):
+    """
+    Retorna (máscara de valores no None, matriz de códigos de caracter de ancho columnas, con 0 tras el final de
+    cada texto, largo de cada texto). Los textos más largos se recortan, y NumPy termina los textos en el primer
+    '\x00': los controles comparan con el largo, que es el del texto original
+    """
+    objetos = numpy.array(columna, dtype=object)
+    presentes = numpy.not_equal(objetos, None)
+    objetos = numpy.where(presentes, objetos, "")
+    largos = numpy.frompyfunc(len, 1, 1)(objetos).astype(numpy.int64)
+    texto = objetos.astype("U%d" % ancho)
+    return presentes, texto.view(numpy.uint32).reshape(len(objetos), ancho).astype(numpy.int64), largos
+
+
+def _fechas_enteras(numpy, columna):
+    """Versión vectorizada de _fecha_entera: retorna (máscara de valores no None, fechas aaaammdd o 0)"""
+    presentes, codigos, largos = _codigos(numpy, columna, 10)
+    cifras = (codigos >= ord("0")) & (codigos <= ord("9"))
+    separador = codigos[:, 2]
+    forma = (cifras[:, _CIFRAS_FECHA].all(axis=1) & (largos == 10) & (separador == codigos[:, 5])
+             & ((separador == ord("/")) | (separador == ord("-"))))
+    valores = codigos - ord("0")
+    dia = valores[:, 0] * 10 + valores[:, 1]
+    mes = valores[:, 3] * 10 + valores[:, 4]
+    anio = valores[:, 6] * 1000 + valores[:, 7] * 100 + valores[:, 8] * 10 + valores[:, 9]
+    bisiesto = (anio % 4 == 0) & ((anio % 100 != 0) | (anio % 400 == 0))
+    dias_mes = numpy.array(_DIAS_MES)[numpy.clip(mes, 0, 12)] + (bisiesto & (mes == 2))
+    valida = forma & (anio >= 1) & (mes >= 1) & (mes <= 12) & (dia >= 1) & (dia <= dias_mes)
+    return presentes, numpy.where(valida, anio * 10000 + mes * 100 + dia, 0)
+
+
+def _validar_numpy(numpy, lote, hoy):
+    # DNI: 7 u 8 cifras, sin otros caracteres
+    presentes, codigos, largos = _codigos(numpy, lote["dni"], 8)
+    cifras = (codigos >= ord("0")) & (codigos <= ord("9"))
+    largo = cifras.sum(axis=1)
+    valido = (largo == largos) & (largo >= 7) & (largo <= 8)
+    exponentes = numpy.maximum(largo[:, None] - 1 - numpy.arange(8), 0)
+    dni = (numpy.where(cifras, codigos - ord("0"), 0) * 10 ** exponentes).sum(axis=1)
+
+    # CUIL: cifras del DNI completado a 8 con ceros y el prefijo del sexo
+    cifras_dni = dni[:, None] // 10 ** numpy.arange(7, -1, -1) % 10
+    suma_dni = cifras_dni @ numpy.array(_PESOS_CUIL[2:])
+    sexo = numpy.array(lote["sexo"], dtype=object)
+    prefijo = numpy.select([sexo == letra for letra in PREFIJOS_CUIL], list(PREFIJOS_CUIL.values()), 0)
+
+    def digito(prefijo):
+        return (11 - (prefijo // 10 * _PESOS_CUIL[0] + prefijo % 10 * _PESOS_CUIL[1] + suma_dni) % 11) % 11
+
+    con_cuil = presentes & valido & (prefijo > 0)
+    verificador = digito(prefijo)
+    prefijo = numpy.where(verificador == 10, PREFIJO_CUIL_ALTERNATIVO, prefijo)
+    verificador = numpy.where(verificador == 10, digito(prefijo), verificador)
+    cuil = numpy.where(con_cuil, (prefijo * 10 ** 9 + dni * 10 + verificador).astype("U11").astype(object), None)
+
+    problemas = numpy.where(presentes & ~valido, int(Problema.DNI_INVALIDO), 0)
+    (con_nacimiento, nacimiento), (con_emision, emision), (con_vencimiento, vencimiento) = (
+        _fechas_enteras(numpy, lote[campo]) for campo in _FECHAS)
+    invalida = ((con_nacimiento & (nacimiento == 0)) | (con_emision & (emision == 0))
+                | (con_vencimiento & (vencimiento == 0)))
+    problemas |= numpy.where(invalida, int(Problema.FECHA_INVALIDA), 0)
+    problemas |= numpy.where((nacimiento > 0) & (nacimiento > hoy), int(Problema.NACIMIENTO_FUTURO), 0)
+    problemas |= numpy.where((emision > 0) & (vencimiento > 0) & (vencimiento < emision),
+                             int(Problema.VENCIMIENTO_ANTERIOR_EMISION), 0)
+    problemas |= numpy.where((nacimiento > 0) & (emision > 0) & (emision < nacimiento),
+                             int(Problema.EMISION_ANTERIOR_NACIMIENTO), 0)
+    return {"cuil": cuil.tolist(), "problemas": problemas.tolist()}
@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+"""
+Lectura incremental para lectores tipo keyboard wedge, que tipean el contenido del código PDF417 caracter por
+caracter. En lugar de esperar la línea completa, IncrementalParser avanza con cada caracter recibido: detecta el
+teclado y los formatos posibles con el primer separador, valida cada campo con los validadores del modo TOKENS a
+medida que se completa, y da la lectura por terminada en cuanto su contenido lo permite, sin depender de un salto de
+línea final (el carnet de conductor ocupa 19 líneas).
+
+    parser = IncrementalParser()
+    for caracteres in teclas:
+        for lectura in parser.feed(caracteres):
+            ...
+
+Una lectura termina:
+
+    · DNI generación 3: al completarse la fecha de emisión, o el campo que la sigue en la versión 'soft'
+    · DNI generación 1 y 2: al completarse el último campo, que termina en '>>dddd' (teclado ES) o '::dddd' o
+      '::dd__' (teclado US)
+    · En cualquier formato, con un salto de línea (salvo los que separan los campos del carnet de conductor), al
+      completarse la línea 19 del carnet, tras espera segundos sin recibir caracteres (ver revisar) o con finalizar
+
+Los caracteres que lleguen luego de que una lectura termina por su contenido (por ejemplo el campo sin identificar
+al final del DNI generación 3) se descartan hasta el siguiente salto de línea o pausa. El documento de cada lectura
+se procesa con Document sobre el texto recibido, por lo que el resultado es el mismo que al leer la línea entera,
+salvo la muestra, que no incluye los caracteres descartados.
+"""
+from re import compile as compile_pattern
+from time import monotonic
+
+from document_reader import Document, ModoLectura, TipoDocumento, intercambiar_teclado, reparar
+
+# Final del último campo de los DNI generación 1 y 2 ('0040>2008>>0014', '0040:2008::00__')
+_FIN_GEN_UNO_DOS = compile_pattern("(>>|::)[0-9_]{4}$")
+# Blancos de un campo, que se reducen a un espacio como en normalizar
+_espacios = compile_pattern(r"[^\S\n]+")
+
+_SEPARADORES_DNI = {"\"": "US", "@": "ES"}
+
+# Validadores por posición de cada formato, en el orden histórico de evaluación, de los Document._formatos con los
+# que se calcularon (se recalculan si se registra un formato)
+_validadores = (None, ())
+
+
+def _validadores_formatos():
+    global _validadores
+    if _validadores[0] is not Document._formatos:
+        _validadores = (Document._formatos, tuple((formato, dict(formato.campos)) for formato in Document._formatos))
+    return _validadores[1]
+
+
+def _completo(formato, indice, campo):
+    """
+    Indica si la lectura del formato termina con el campo actual, de posición indice y valor canónico campo
+    (parcial), suponiendo válidos todos los campos anteriores
+    """
+    if formato.separador == "\n" or indice + 1 < formato.minimo:
+        return False
+    ultimo, valida = formato.campos[-1]
+    if indice == ultimo:
+        return valida(campo)
+    if formato.tipo_documento in (TipoDocumento.DNI_GEN_1, TipoDocumento.DNI_GEN_2):
+        return _FIN_GEN_UNO_DOS.search(campo) is not None
+    return True
+
+
+class IncrementalParser(object):
+    """
+    Procesador incremental de lecturas. modo es el ModoLectura con el que se procesa cada lectura terminada, espera
+    los segundos sin recibir caracteres tras los que revisar (o el siguiente feed) da por terminada la lectura en
+    curso (None, sin límite).
+
+    Mientras la lectura está en curso, teclado, tipo_documento y rechazada informan lo que se sabe hasta el momento.
+    No es seguro para compartir entre hilos: se usa un procesador por lector.
+    """
+
+    def __init__(self, modo=ModoLectura.REGEX, espera=0.3, reloj=monotonic):
+        self.modo = modo
+        self.espera = espera
+        self._reloj = reloj
+        self._ultimo = None
+        self._retorno = False
+        self._descartando = False
+        self.lecturas = 0
+        self._reiniciar()
+
+    def _reiniciar(self):
+        self._texto = []
+        self._campo = []
+        self._indice = 0
+        self._separador = None
+        self._candidatos = None
+        self.teclado = None
+
+    @property
+    def tipo_documento(self):
+        """Tipo de documento de la lectura en curso, si todos los formatos posibles coinciden en él"""
+        tipos = {formato.tipo_documento for formato, _ in self._candidatos or ()}
+        return tipos.pop() if len(tipos) == 1 else None
+
+    @property
+    def rechazada(self):
+        """Indica si la lectura en curso ya no puede cumplir ningún formato"""
+        return self._candidatos == []
+
+    def feed(self, caracteres):
+        """
+        Procesa los caracteres recibidos. Retorna la lista de Lectura (ver Document.parse_many) de las lecturas que
+        terminaron, normalmente vacía o con un elemento
+        """
+        terminadas = self.revisar()
+        for caracter in caracteres:
+            self._procesar(caracter, terminadas)
+        self._ultimo = self._reloj()
+        return terminadas
+
+    def revisar(self):
+        """
+        Da por terminada la lectura en curso si pasaron espera segundos desde el último caracter. Pensado para
+        llamarse periódicamente, ya que el carnet de conductor sólo termina así o con su último salto de línea.
+        Retorna la lista de Lectura terminadas
+        """
+        terminadas = []
+        if self.espera is not None and self._ultimo is not None and self._reloj() - self._ultimo > self.espera:
+            self._descartando = False
+            self._terminar(terminadas)
+        return terminadas
+
+    def finalizar(self):
+        """Da por terminada la lectura en curso. Retorna la lista de Lectura terminadas"""
+        terminadas = []
+        self._descartando = False
+        self._terminar(terminadas)
+        return terminadas
+
+    def _procesar(self, caracter, terminadas):
+        if caracter == "\r":
+            self._retorno = True
+            caracter = "\n"
+        elif caracter == "\n" and self._retorno:
+            self._retorno = False
+            return
+        else:
+            self._retorno = False
+        if self._descartando:
+            self._descartando = caracter != "\n"
+            return
+        if caracter == "\n":
+            if self._separador is None and "".join(self._campo).strip() == "DNI":
+                self._iniciar("\n", None)
+            elif self._separador != "\n":
+                self._terminar(terminadas)
+                return
+            self._texto.append(caracter)
+            if self._cerrar_campo():
+                self._terminar(terminadas)
+            return
+        if not self._texto and caracter.isspace():
+            return
+        self._texto.append(caracter)
+        if self._separador is None and caracter in _SEPARADORES_DNI:
+            self._iniciar(caracter, _SEPARADORES_DNI[caracter])
+            completo = self._cerrar_campo()
+        elif caracter == self._separador:
+            completo = self._cerrar_campo()
+        else:
+            self._campo.append(caracter)
+            formato = self._candidatos[0][0] if self._candidatos else None
+            completo = (formato is not None and self._indice + 1 >= formato.minimo
+                        and _completo(formato, self._indice, self._canonico()))
+        if completo:
+            self._terminar(terminadas)
+            self._descartando = True
+
+    def _iniciar(self, separador, teclado):
+        self._separador = separador
+        self.teclado = teclado
+        canonico = "\n" if separador == "\n" else "@"
+        self._candidatos = [(formato, validadores) for formato, validadores in _validadores_formatos()
+                            if formato.separador == canonico]
+
+    def _canonico(self):
+        """Campo actual normalizado como en normalizar, reparado (ver REPARACIONES) y en forma canónica"""
+        campo = _espacios.sub(" ", "".join(self._campo))
+        campo = reparar(campo.strip(" ") if self._separador == "\n" else campo.rstrip(" "))[0]
+        return intercambiar_teclado(campo) if self.teclado == "US" else campo
+
+    def _cerrar_campo(self):
+        """
+        Valida el campo recién completado en cada formato posible y descarta los que no lo cumplen. Retorna True si
+        la lectura terminó (carnet de conductor completo)
+        """
+        if self._separador == "\n" and self._indice == 5:
+            # Primer campo con separador de fechas
+            self.teclado = "ES" if "/" in self._campo else "US"
+        campo = self._canonico()
+        indice = self._indice
+        self._candidatos = [(formato, validadores) for formato, validadores in self._candidatos
+                            if indice not in validadores or validadores[indice](campo)]
+        self._campo = []
+        self._indice += 1
+        if self._candidatos:
+            formato = self._candidatos[0][0]
+            if formato.separador == "\n":
+                return self._indice == formato.maximo
+            return _completo(formato, self._indice, "")
+        return False
+
+    def _terminar(self, terminadas):
+        if self._texto:
+            self.lecturas += 1
+            texto = "".join(self._texto)
+            terminadas.append(next(Document.parse_many((texto,), self.modo))._replace(numero=self.lecturas))
+        self._reiniciar()
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""
+Generador de lecturas sintéticas para todas las variantes de documento que procesa document_reader, con los
+mismos formatos que las muestras de Document: carnet de conductor, DNI generación 1, 2 y 3 con teclado US y ES, las
+versiones 'soft', los casos de la tilde y de la vocal acentuada leídas como '{', el campo desconocido al inicio del
+DNI gen. 2, y lecturas basura de un lector que falla.
+
+    from scan_generator import lecturas
+    for variante, lectura in lecturas(1000):
+        ...
+"""
+from random import Random
+
+from document_reader import TipoDocumento
+
+NOMBRES = ("LUCAS", "EMILIO", "SUSANA", "BEATRIZ", "ANA", "MARIA", "ELIANA", "GUILLERMINA", "JAVIER", "GUSTAVO",
+           "RAMON", "NOELIA", "SOLANGE", "BRISA", "GABRIELA", "JOSÉ", "MARTÍN", "AGUSTÍN", "LUCÍA", "SOFÍA")
+APELLIDOS = ("HERRMANN", "GALETTO", "NIEVA", "VIVAS", "SEGOVIA", "ARANDA", "GONZÁLEZ", "RODRÍGUEZ", "PEÑA", "NUÑEZ",
+             "O'CONNOR", "FERNÁNDEZ", "LÓPEZ", "DÍAZ", "PÉREZ")
+CIUDADES = ("PARANA", "SANTA FE", "CORDOBA", "ROSARIO", "CONCORDIA")
+CALLES = ("LUCIO MANSILLA", "SAN MARTIN", "25 DE MAYO", "BELGRANO", "URQUIZA")
+SUFIJOS_GEN_DOS = {"US": ("ILRÑ2.01 CÑ110613.02 )No Cap.=", "UNIDAD ·19 ÇÇ S-NÑ 0040:2008::00__"),
+                   "ES": ("ILR:01.2 C:100817.01", "UNIDAD #07 || S/N: 0040>2008>>0002")}
+SUFIJOS_GEN_UNO = {"US": ("ILRÑ01.11 CÑ100328.01", "UNIDAD ·12 ÇÇ S-NÑ 0040:2008::0014"),
+                   "ES": ("ILR:01.11 C:100328.01", "UNIDAD ·12 || S/N: 0040>2008>>0014")}
+SEPARADORES = {"US": "\"", "ES": "@"}
+SEPARADORES_FECHA = {"US": "-", "ES": "/"}
+VACIOS_CONDUCTOR = {"US": ("PisoÑ '''", "DeptoÑ '''", "BarrioÑ '''", "Bñ", "A ¿"),
+                    "ES": ("Piso: ---", "Depto: ---", "Barrio: ---", "B;", "A +")}
+
+
+def _fecha(rnd, teclado, desde=1940, hasta=2030):
+    return SEPARADORES_FECHA[teclado].join(("%02d" % rnd.randint(1, 28), "%02d" % rnd.randint(1, 12),
+                                            "%04d" % rnd.randint(desde, hasta)))
+
+
+def _nombres(rnd, cantidad=2):
+    return " ".join(rnd.sample(NOMBRES, rnd.randint(1, cantidad)))
+
+
+def _persona(rnd, teclado):
+    return {"dni": "%d" % rnd.randint(10000000, 49999999), "sexo": rnd.choice("MF"), "nombres": _nombres(rnd),
+            "apellidos": rnd.choice(APELLIDOS), "nacimiento": _fecha(rnd, teclado, 1940, 2010),
+            "emision": _fecha(rnd, teclado, 2009, 2023), "vencimiento": _fecha(rnd, teclado, 2024, 2038),
+            "tramite": "%011d" % rnd.randint(1, 99999999999), "ejemplar": rnd.choice("ABCD")}
+
+
+def conductor(rnd, teclado):
+    p = _persona(rnd, teclado)
+    piso, depto, barrio, categoria, grupo = VACIOS_CONDUCTOR[teclado]
+    return "\n".join(("DNI", p["dni"], p["sexo"], p["nombres"], p["apellidos"], p["nacimiento"], "ARGENTINA",
+                      rnd.choice(CALLES), "N %d" % rnd.randint(1, 9999), piso, depto, barrio, rnd.choice(CIUDADES),
+                      "%d" % rnd.randint(1000, 9999), p["emision"], p["vencimiento"], categoria, grupo,
+                      "%d" % rnd.randint(100000000, 999999999)))
+
+
+def gen_tres(rnd, teclado, corrupcion_acento=False, vocal_perdida=False):
+    p = _persona(rnd, teclado)
+    nombres = p["nombres"]
+    if corrupcion_acento and vocal_perdida:
+        # Vocal acentuada leída como '{' sola, como en MART{N
+        nombres = nombres.replace("É", "{").replace("Í", "{") if "É" in nombres or "Í" in nombres else "JOS{ LUCAS"
+    elif corrupcion_acento:
+        # Tilde leída como '{' seguida de la vocal, como en BEL{EN
+        nombres = nombres.replace("É", "{E").replace("Í", "{I") if "É" in nombres or "Í" in nombres else "BEL{EN"
+    campos = [p["tramite"], p["apellidos"], nombres, p["sexo"], p["dni"], p["ejemplar"], p["nacimiento"],
+              p["emision"]]
+    if rnd.random() < 0.5:
+        # Campo sin identificar al final de la fecha de emisión
+        campos.append("%d" % rnd.randint(100, 299))
+    return SEPARADORES[teclado].join(campos)
+
+
+def gen_tres_soft(rnd, teclado):
+    # Falta el número de trámite y parte del apellido al comenzar la lectura
+    p = _persona(rnd, teclado)
+    apellido = p["apellidos"][-rnd.randint(1, len(p["apellidos"])):]
+    return SEPARADORES[teclado].join((apellido, p["nombres"], p["sexo"], p["dni"], p["ejemplar"], p["nacimiento"],
+                                      p["emision"], "%d" % rnd.randint(100, 299)))
+
+
+def gen_dos(rnd, teclado, campo_desconocido=False):
+    p = _persona(rnd, teclado)
+    separador = SEPARADORES[teclado]
+    campos = ["2" if campo_desconocido else "", p["dni"] + "    ", p["ejemplar"], "1", p["apellidos"], p["nombres"],
+              "ARGENTINA", p["nacimiento"], p["sexo"], p["emision"], p["tramite"], "%d" % rnd.randint(1000, 9999),
+              p["vencimiento"], "%d" % rnd.randint(1, 999), "0"]
+    return separador.join(campos + list(SUFIJOS_GEN_DOS[teclado]))
+
+
+def gen_uno(rnd, teclado, soft=False):
+    p = _persona(rnd, teclado)
+    campos = [""] + ([] if soft else [p["dni"] + "    "]) + [
+        p["ejemplar"], "1", p["apellidos"], p["nombres"], "ARGENTINA", p["nacimiento"], p["sexo"], p["emision"],
+        p["tramite"], "%d" % rnd.randint(1000, 9999), "%d" % rnd.randint(1000, 9999)]
+    return SEPARADORES[teclado].join(campos + list(SUFIJOS_GEN_UNO[teclado]))
+
+
+def basura(rnd):
+    # Lectura de un lector que falla: caracteres sueltos, sin estructura
+    return "".join(rnd.choice("ABCXYZ0123456789 -/:.") for _ in range(rnd.randint(1, 120)))
+
+
+def truncada(rnd):
+    # Lectura cortada de un documento válido, con separadores pero sin todos sus campos
+    lectura = rnd.choice((gen_tres, gen_dos, gen_uno))(rnd, rnd.choice(("US", "ES")))
+    return lectura[:rnd.randint(1, len(lectura) - 1)]
+
+
+"""
+Variantes generadas: nombre -> (generador que recibe un Random, tipo de documento y teclado esperados). Las lecturas
+basura y truncadas no deberían reconocerse (las truncadas pueden serlo si el corte deja un documento completo)
+"""
+VARIANTES = {
+    "conductor_us": (lambda rnd: conductor(rnd, "US"), TipoDocumento.CONDUCTOR, "US"),
+    "conductor_es": (lambda rnd: conductor(rnd, "ES"), TipoDocumento.CONDUCTOR, "ES"),
+    "gen_tres_us": (lambda rnd: gen_tres(rnd, "US"), TipoDocumento.DNI_GEN_3, "US"),
+    "gen_tres_es": (lambda rnd: gen_tres(rnd, "ES"), TipoDocumento.DNI_GEN_3, "ES"),
+    "gen_tres_acento_us": (lambda rnd: gen_tres(rnd, "US", corrupcion_acento=True), TipoDocumento.DNI_GEN_3, "US"),
+    "gen_tres_acento_es": (lambda rnd: gen_tres(rnd, "ES", corrupcion_acento=True), TipoDocumento.DNI_GEN_3, "ES"),
+    "gen_tres_llave_us": (lambda rnd: gen_tres(rnd, "US", corrupcion_acento=True, vocal_perdida=True),
+                          TipoDocumento.DNI_GEN_3, "US"),
+    "gen_tres_llave_es": (lambda rnd: gen_tres(rnd, "ES", corrupcion_acento=True, vocal_perdida=True),
+                          TipoDocumento.DNI_GEN_3, "ES"),
+    "gen_tres_soft_us": (lambda rnd: gen_tres_soft(rnd, "US"), TipoDocumento.DNI_GEN_3, "US"),
+    "gen_tres_soft_es": (lambda rnd: gen_tres_soft(rnd, "ES"), TipoDocumento.DNI_GEN_3, "ES"),
+    "gen_dos_us": (lambda rnd: gen_dos(rnd, "US"), TipoDocumento.DNI_GEN_2, "US"),
+    "gen_dos_es": (lambda rnd: gen_dos(rnd, "ES"), TipoDocumento.DNI_GEN_2, "ES"),
+    "gen_dos_desconocido_us": (lambda rnd: gen_dos(rnd, "US", campo_desconocido=True), TipoDocumento.DNI_GEN_2,
+                               "US"),
+    "gen_dos_desconocido_es": (lambda rnd: gen_dos(rnd, "ES", campo_desconocido=True), TipoDocumento.DNI_GEN_2,
+                               "ES"),
+    "gen_uno_us": (lambda rnd: gen_uno(rnd, "US"), TipoDocumento.DNI_GEN_1, "US"),
+    "gen_uno_es": (lambda rnd: gen_uno(rnd, "ES"), TipoDocumento.DNI_GEN_1, "ES"),
+    "gen_uno_soft_us": (lambda rnd: gen_uno(rnd, "US", soft=True), TipoDocumento.DNI_GEN_1, "US"),
+    "gen_uno_soft_es": (lambda rnd: gen_uno(rnd, "ES", soft=True), TipoDocumento.DNI_GEN_1, "ES"),
+    "basura": (basura, None, None),
+    "truncada": (truncada, None, None),
+}
+
+
+def lecturas(cantidad, variantes=None, semilla=0):
+    """
+    Generador de cantidad pares (variante, lectura), repartidos en partes iguales y en orden aleatorio entre las
+    variantes indicadas (por defecto, todas). Con la misma semilla se generan siempre las mismas lecturas
+    """
+    rnd = Random(semilla)
+    variantes = list(variantes or VARIANTES)
+    for _ in range(cantidad):
+        variante = rnd.choice(variantes)
+        yield variante, VARIANTES[variante][0](rnd)
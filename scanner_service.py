@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+Servicio asyncio que atiende en un solo proceso a muchos lectores de documentos a la vez.
+
+    python -m scanner_service --tcp 0.0.0.0:9100 --fifo /run/lector1 --fifo /run/lector2 --stdin
+
+Cada lector es un flujo de líneas (conexión TCP, named pipe o stdin), con una lectura por línea salvo el carnet de
+conductor, que ocupa las 19 líneas que empiezan con la línea 'DNI' (ver lecturas_de_lineas). Las lecturas de
+un mismo lector se procesan en orden, y las de distintos lectores en forma concurrente. El procesamiento de cada
+lectura corre en un executor, fuera del event loop, para que un lector lento o una lectura costosa no demore al
+resto. Cada resultado se emite como una línea JSON identificada con el lector; a las conexiones TCP además se les
+responde por la misma conexión.
+"""
+import asyncio
+import os
+import sys
+from argparse import ArgumentParser
+
+from batch_reader import lectura_a_json
+from document_reader import LINEAS_CONDUCTOR, SEPARADORES_LINEA, Document, ModoLectura
+
+# Segundos sin recibir líneas tras los que se entrega incompleto un carnet de conductor
+ESPERA_CONDUCTOR = 2.0
+
+
+def _imprimir(resultado):
+    print(resultado, flush=True)
+
+
+async def lecturas_de_lineas(reader, espera=ESPERA_CONDUCTOR):
+    """
+    Generador asincrónico de las lecturas de un flujo de líneas en bytes: una por línea no vacía, salvo el carnet de
+    conductor, que se junta desde la línea 'DNI' hasta completar sus LINEAS_CONDUCTOR líneas (algunas pueden estar
+    vacías). Un carnet se entrega incompleto si lo interrumpe otra línea 'DNI' o una línea con SEPARADORES_LINEA
+    (una lectura de una línea, que se entrega a continuación), si pasan espera segundos sin recibir líneas (None,
+    sin límite) o al terminar el flujo
+    """
+    bloque = None
+    while True:
+        if bloque is None:
+            linea = await reader.readline()
+        else:
+            try:
+                linea = await asyncio.wait_for(reader.readline(), espera)
+            except asyncio.TimeoutError:
+                yield "\n".join(bloque)
+                bloque = None
+                continue
+        if not linea:
+            break
+        entrada = linea.decode("utf-8", errors="replace").strip("\r\n")
+        dni = entrada.strip() == "DNI"
+        if bloque is not None and (dni or any(separador in entrada for separador in SEPARADORES_LINEA)):
+            yield "\n".join(bloque)
+            bloque = None
+        if dni:
+            bloque = [entrada]
+        elif bloque is not None:
+            bloque.append(entrada)
+        elif entrada.strip():
+            yield entrada
+        if bloque is not None and len(bloque) == LINEAS_CONDUCTOR:
+            yield "\n".join(bloque)
+            bloque = None
+    if bloque:
+        yield "\n".join(bloque)
+
+
+class ScannerService(object):
+    """
+    Servicio de lectura. modo es el ModoLectura de Document, executor el concurrent.futures.Executor donde se
+    procesan las lecturas (None usa el executor por defecto del event loop), salida una función que recibe cada
+    resultado como línea JSON (por defecto, se imprime por stdout) y espera los segundos sin recibir líneas tras los
+    que se entrega incompleto un carnet de conductor (ver lecturas_de_lineas).
+    """
+
+    def __init__(self, modo=ModoLectura.REGEX, executor=None, salida=_imprimir, espera=ESPERA_CONDUCTOR):
+        self.modo = modo
+        self.executor = executor
+        self.salida = salida
+        self.espera = espera
+        self.lectores = 0
+
+    def procesar(self, entrada):
+        """Procesa una lectura de forma sincrónica. Retorna la Lectura"""
+        return next(Document.parse_many((entrada,), self.modo))
+
+    async def atender(self, lector, reader, writer=None):
+        """
+        Atiende un lector hasta el fin de su flujo. lector identifica al lector en los resultados, reader es un
+        asyncio.StreamReader y writer, si se provee, el asyncio.StreamWriter donde responder cada resultado.
+        """
+        loop = asyncio.get_running_loop()
+        self.lectores += 1
+        numero = 0
+        try:
+            async for entrada in lecturas_de_lineas(reader, self.espera):
+                numero += 1
+                lectura = await loop.run_in_executor(self.executor, self.procesar, entrada)
+                resultado = lectura_a_json(lectura._replace(numero=numero), lector=lector)
+                self.salida(resultado)
+                if writer is not None:
+                    writer.write(resultado.encode("utf-8") + b"\n")
+                    await writer.drain()
+        finally:
+            self.lectores -= 1
+
+    async def atender_tcp(self, host, port):
+        """Inicia un servidor TCP donde cada conexión es un lector. Retorna el asyncio.Server"""
+
+        async def atender_conexion(reader, writer):
+            lector = "tcp:%s:%s" % writer.get_extra_info("peername")[:2]
+            try:
+                await self.atender(lector, reader, writer)
+            except ConnectionError:
+                pass
+            finally:
+                writer.close()
+
+        return await asyncio.start_server(atender_conexion, host, port)
+
+    async def atender_pipe(self, lector, archivo):
+        """Atiende un archivo de lectura no bloqueante (stdin, named pipe) hasta su fin"""
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader()
+        transporte, _ = await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), archivo)
+        try:
+            await self.atender(lector, reader)
+        finally:
+            transporte.close()
+
+    async def atender_stdin(self):
+        await self.atender_pipe("stdin", sys.stdin)
+
+    async def atender_fifo(self, ruta):
+        """
+        Atiende un named pipe. Se abre también para escritura, de modo que el pipe no llegue a su fin cuando el
+        lector cierra su extremo y pueda volver a conectarse sin reabrirlo
+        """
+        descriptor = os.open(ruta, os.O_RDWR | os.O_NONBLOCK)
+        with os.fdopen(descriptor, "rb", buffering=0) as archivo:
+            await self.atender_pipe("fifo:" + ruta, archivo)
+
+
+async def servir(tcp=(), fifos=(), stdin=False, modo=ModoLectura.REGEX):
+    """Atiende las direcciones TCP (pares host, puerto), named pipes y stdin indicados hasta ser cancelado"""
+    servicio = ScannerService(modo)
+    servidores = [await servicio.atender_tcp(host, port) for host, port in tcp]
+    tareas = [asyncio.ensure_future(servicio.atender_fifo(ruta)) for ruta in fifos]
+    if stdin:
+        tareas.append(asyncio.ensure_future(servicio.atender_stdin()))
+    tareas.extend(asyncio.ensure_future(servidor.serve_forever()) for servidor in servidores)
+    try:
+        await asyncio.gather(*tareas)
+    finally:
+        for servidor in servidores:
+            servidor.close()
+
+
+def _direccion(valor):
+    host, _, port = valor.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+def main(argumentos=None):
+    parser = ArgumentParser(prog="python -m scanner_service", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tcp", type=_direccion, action="append", default=[], metavar="HOST:PUERTO",
+                        help="dirección TCP donde aceptar lectores")
+    parser.add_argument("--fifo", action="append", default=[], metavar="RUTA", help="named pipe de un lector")
+    parser.add_argument("--stdin", action="store_true", help="atender la entrada estándar como un lector")
+    parser.add_argument("-m", "--modo", choices=[modo.value for modo in ModoLectura], default=ModoLectura.REGEX.value)
+    argumentos = parser.parse_args(argumentos)
+    if not (argumentos.tcp or argumentos.fifo or argumentos.stdin):
+        parser.error("se debe indicar al menos un lector (--tcp, --fifo o --stdin)")
+    try:
+        asyncio.run(servir(argumentos.tcp, argumentos.fifo, argumentos.stdin, ModoLectura(argumentos.modo)))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,372 @@
+# -*- coding: utf-8 -*-
+"""
+Pruebas de equivalencia entre los caminos alternativos de procesamiento (TOKENS y REGEX, NumPy y Python, rangos en
+paralelo y recorrido secuencial, lectura incremental y de la línea entera, snapshot del índice), regresiones y
+tiempo lineal con las lecturas adversariales de benchmark_reader.
+
+    python -m pytest -q
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from random import Random
+from timeit import repeat
+
+import pytest
+
+from benchmark_reader import ADVERSARIALES
+from capture_reader import parse_capture
+from document_cache import DocumentCache
+from document_export import LoteColumnar
+from document_index import EstadoEjemplar, IndiceDocumentos
+from document_metrics import Metricas
+from document_reader import (CIFRAS, NOMBRE, CampoFormato, Document, DocumentParser, ModoLectura, OrdenFormatos,
+                             TipoDocumento, declarar_formato)
+from document_validation import validar_lote
+from incremental_reader import IncrementalParser
+from scan_generator import VARIANTES, lecturas
+from scanner_service import lecturas_de_lineas
+
+# Variantes que no son documentos válidos
+_INVALIDAS = ("basura", "truncada")
+_VALIDAS = [variante for variante in VARIANTES if variante not in _INVALIDAS]
+
+_GEN_TRES = "00342157442@HERRMANN@LUCAS EMILIO@M@35296844@A@16/09/1990@06/02/2015"
+
+
+def _muestras(cantidad, variantes=None, semilla=1):
+    return [lectura for _, lectura in lecturas(cantidad, variantes, semilla)]
+
+
+@pytest.mark.parametrize("variante", _VALIDAS)
+def test_tokens_equivale_a_regex(variante):
+    for muestra in _muestras(40, (variante,)):
+        regex, tokens = Document(muestra, ModoLectura.REGEX), Document(muestra, ModoLectura.TOKENS)
+        assert regex.tipo_documento is VARIANTES[variante][1]
+        assert tokens.to_dict() == regex.to_dict()
+
+
+@pytest.mark.parametrize("variante", ("conductor_us", "conductor_es"))
+def test_carnet_conductor_en_modo_tokens(variante):
+    # Los validadores del domicilio eran partial(str.startswith, prefix=...), que lanza TypeError
+    for muestra in _muestras(10, (variante,)):
+        assert Document(muestra, ModoLectura.TOKENS).tipo_documento is TipoDocumento.CONDUCTOR
+
+
+def test_validacion_numpy_equivale_a_python():
+    pytest.importorskip("numpy")
+    documentos = [Document(muestra) for muestra in _muestras(500)]
+    documentos += [Document(_GEN_TRES.replace("16/09/1990", fecha)) for fecha in ("31/02/1990", "16/09/2990")]
+    lote = LoteColumnar(documentos).columnas
+    # Valores con '\x00', donde NumPy termina sus textos
+    for campo, valores in (("dni", ("4807415\x00", "12\x0034567", "1234567\x00\x00")), ("sexo", ("M", "F", "M")),
+                           ("fecha_nacimiento", ("11-10-2015\x00B79", "11/10\x00/2015", None))):
+        lote[campo] = lote[campo] + list(valores)
+    for campo in lote:
+        lote[campo] += [None] * (len(lote["dni"]) - len(lote[campo]))
+    hoy = date(2024, 1, 1)
+    vectorizado = validar_lote(lote, hoy, vectorizado=True)
+    assert vectorizado == validar_lote(lote, hoy, vectorizado=False)
+    assert all(vectorizado["problemas"][-5:]) and vectorizado["cuil"][-3:] == [None] * 3
+
+
+def test_lote_columnar_a_numpy():
+    pytest.importorskip("numpy")
+    documentos = [Document(muestra) for muestra in _muestras(50)]
+    documentos += [Document(muestra) for muestra in _muestras(2, ("conductor_us",))]
+    lote = LoteColumnar(documentos)
+    arreglos = lote.a_numpy()
+    assert list(arreglos) == list(lote.columnas)
+    for campo, arreglo in arreglos.items():
+        assert arreglo.dtype == object and arreglo.shape == (len(lote),)
+        assert arreglo.tolist() == lote[campo]
+    assert None in arreglos["nombres"].tolist()
+    assert arreglos["reparaciones"][-1] == "domicilio_us"
+
+
+def _escribir_captura(ruta, partes):
+    with open(ruta, "w", encoding="utf-8") as archivo:
+        archivo.write("\n".join(partes) + "\n")
+
+
+def _posiciones(registros):
+    return [(registro.inicio, registro.fin, registro.lectura.entrada) for registro in registros]
+
+
+def test_captura_en_paralelo_equivale_a_secuencial(tmp_path):
+    ruta = str(tmp_path / "captura.log")
+    partes = _muestras(400, ("conductor_us", "conductor_es", "gen_tres_es", "gen_tres_us", "gen_uno_es"))
+    # Carnets interrumpidos, seguidos de otros documentos
+    partes = [parte if numero % 5 or "\n" not in parte else "\n".join(parte.split("\n")[:numero % 17 + 1])
+              for numero, parte in enumerate(partes)]
+    _escribir_captura(ruta, partes)
+    secuencial = list(parse_capture(ruta, parciales=True))
+    assert [registro.lectura.entrada for registro in secuencial] == partes
+    for workers, tamano_rango in ((1, 97), (2, 512), (4, 4096)):
+        assert _posiciones(parse_capture(ruta, workers=workers, parciales=True,
+                                         tamano_rango=tamano_rango)) == _posiciones(secuencial)
+
+
+def test_captura_carnet_interrumpido(tmp_path):
+    ruta = str(tmp_path / "captura.log")
+    _escribir_captura(ruta, ["DNI", "23539652", "M"] + [_GEN_TRES] * 5)
+    registros = list(parse_capture(ruta))
+    assert [registro.lectura.entrada for registro in registros] == ["DNI\n23539652\nM"] + [_GEN_TRES] * 5
+    assert all(registro.lectura.documento.dni == "35296844" for registro in registros[1:])
+
+
+def test_servicio_carnet_interrumpido():
+    async def leer(datos):
+        reader = asyncio.StreamReader()
+        reader.feed_data(datos)
+        reader.feed_eof()
+        return [lectura async for lectura in lecturas_de_lineas(reader)]
+
+    datos = ("DNI\n23539652\nM\n" + (_GEN_TRES + "\n") * 5).encode("utf-8")
+    assert asyncio.run(leer(datos)) == ["DNI\n23539652\nM"] + [_GEN_TRES] * 5
+
+
+def test_servicio_carnet_incompleto_por_espera():
+    async def leer():
+        reader = asyncio.StreamReader()
+        reader.feed_data(b"DNI\n23539652\nM\n")
+        generador = lecturas_de_lineas(reader, espera=0.05)
+        primera = await generador.__anext__()
+        reader.feed_data((_GEN_TRES + "\n").encode("utf-8"))
+        reader.feed_eof()
+        return [primera] + [lectura async for lectura in generador]
+
+    assert asyncio.run(leer()) == ["DNI\n23539652\nM", _GEN_TRES]
+
+
+def test_indice_snapshot(tmp_path):
+    ruta = str(tmp_path / "documentos.idx")
+    indice = IndiceDocumentos()
+    documentos = [documento for documento in map(Document, _muestras(300, _VALIDAS)) if documento.tipo_documento]
+    estados = [indice.agregar(documento) for documento in documentos]
+    indice.guardar(ruta)
+    cargado = IndiceDocumentos.cargar(ruta)
+    assert len(cargado) == len(indice)
+    for documento in documentos:
+        assert cargado.buscar_dni(documento.dni_valor) == indice.buscar_dni(documento.dni_valor)
+        assert cargado.buscar_tramite(documento.numero_tramite_valor) == indice.buscar_tramite(
+            documento.numero_tramite_valor)
+    for documento, estado in zip(documentos, estados):
+        if estado is not None:
+            assert cargado.agregar(documento) is EstadoEjemplar.REPETIDO
+
+
+@pytest.mark.parametrize("muestra", ("@-5@A@1@HERRMANN@LUCAS@ARGENTINA@03/01/1961@M@17/01/2016@27192484831@6570@"
+                                     "8841@ILR:01.11 C:100328.01@UNIDAD ·12 || S/N: 0040>2008>>0014",
+                                     "99999999999999999999999" + _GEN_TRES[11:]))
+def test_indice_valores_fuera_de_rango(muestra):
+    documento = Document(muestra)
+    assert documento.tipo_documento is not None
+    indice = IndiceDocumentos()
+    assert indice.agregar(documento) is None
+    assert len(indice) == 0
+
+
+def _sin_muestra(documento):
+    return {campo: valor for campo, valor in vars(documento).items() if campo != "muestra"}
+
+
+@pytest.mark.parametrize("variante", _VALIDAS)
+def test_incremental_equivale_a_linea_entera(variante):
+    for muestra in _muestras(20, (variante,)):
+        parser = IncrementalParser(espera=None)
+        terminadas = []
+        for caracter in muestra + "\n":
+            terminadas += parser.feed(caracter)
+        terminadas += parser.finalizar()
+        assert len(terminadas) == 1
+        assert _sin_muestra(terminadas[0].documento) == _sin_muestra(Document(muestra))
+
+
+@pytest.mark.parametrize("modo", list(ModoLectura))
+@pytest.mark.parametrize("muestra, apellidos, nombres", (
+    ("29079175486@RODR{GUEZ@LUCAS@M@44959585@B@02/05/1990@21/03/2011@188", "RODR{GUEZ", "LUCAS"),
+    ("00694683548@MART{N@ANA@F@41910327@D@21/06/1999@30/09/2022@271", "MART{N", "ANA"),
+    ("00694683548@PEREZ@JOS{ LUCAS@M@41910327@D@21/06/1999@30/09/2022@271", "PEREZ", "JOS{ LUCAS"),
+    # '{' seguida de una vocal: puede ser la tilde de esa vocal o la vocal acentuada anterior perdida
+    ("00694683548@ARANDA@MAR{A JOS{@F@41910327@D@21/06/1999@30/09/2022@271", "ARANDA", "MAR{A JOS{"),
+    ("00694683548@ARANDA@BRISA BEL{EN@F@41910327@D@21/06/1999@30/09/2022@271", "ARANDA", "BRISA BEL{EN"),
+))
+def test_vocal_acentuada_leida_como_llave(modo, muestra, apellidos, nombres):
+    documento = Document(muestra, modo)
+    assert documento.tipo_documento is TipoDocumento.DNI_GEN_3
+    assert (documento.apellidos, documento.nombres, documento.sexo) == (apellidos, nombres, muestra.split("@")[3])
+    assert documento.reparaciones == ()
+    assert documento.muestra == muestra
+
+
+def test_reparaciones_en_registro():
+    muestra = _muestras(1, ("conductor_us",))[0]
+    documento = Document(muestra)
+    assert documento.tipo_documento is TipoDocumento.CONDUCTOR
+    # Los campos se extraen de la lectura reparada, y la muestra es la lectura sin reparar
+    assert documento.muestra == muestra and "PisoÑ" in muestra
+    assert documento.direccion_piso.startswith("Piso:")
+    assert documento.to_record().reparaciones == documento.to_dict()["reparaciones"] == ("domicilio_us",)
+    assert Document(_GEN_TRES).to_record().reparaciones is None
+
+
+@pytest.mark.parametrize("soft, variante", (("dni_gen_tres_soft", "gen_tres_es"), ("dni_gen_uno_soft", "gen_uno_es")))
+def test_formato_soft_sin_version_completa(soft, variante):
+    # Sin la versión completa, el patrón 'soft' coincide desplazado con una lectura completa
+    with pytest.raises(ValueError):
+        DocumentParser(formatos=(soft,))
+    with pytest.raises(ValueError):
+        OrdenFormatos(formatos=(soft,))
+    completo = soft[:-len("_soft")]
+    for modo in ModoLectura:
+        parser = DocumentParser(modo, formatos=(completo, soft))
+        for muestra in _muestras(20, (variante,)):
+            assert parser.parse(muestra) == Document(muestra).to_record()
+
+
+@pytest.mark.parametrize("modo", list(ModoLectura))
+def test_metricas_con_orden(modo):
+    # Con el formato 'soft' adelantado, tras su coincidencia se intenta el formato completo, que no coincide
+    metricas = Metricas()
+    parser = DocumentParser(modo, orden=OrdenFormatos(("dni_gen_tres_soft",)), metricas=metricas)
+    for muestra in _muestras(5, ("gen_tres_soft_es",)):
+        assert parser.parse(muestra) == Document(muestra).to_record()
+    formatos = metricas.a_dict()["formatos"]
+    assert formatos["dni_gen_tres_soft"]["coincidencias"] == 5
+    assert formatos.get("dni_gen_tres", {"coincidencias": 0})["coincidencias"] == 0
+    assert (metricas.intentos.total, metricas.intentos.suma) == (5, 5)
+
+
+def _ordenes(cantidad, semilla=2):
+    """Perfiles al azar (subconjuntos de formatos en cualquier orden) y un orden adaptativo que reordena siempre"""
+    rnd = Random(semilla)
+    nombres = [formato.nombre for formato in Document._formatos]
+    perfiles = [rnd.sample(nombres, rnd.randint(1, len(nombres))) for _ in range(cantidad)]
+    return ([pytest.param(perfil, 1000, id="-".join(perfil)) for perfil in perfiles]
+            + [pytest.param(None, 1, id="adaptativo")])
+
+
+@pytest.mark.parametrize("modo", list(ModoLectura))
+@pytest.mark.parametrize("perfil, intervalo", _ordenes(12))
+def test_orden_equivale_al_historico(modo, perfil, intervalo):
+    rnd = Random(3)
+    muestras = _muestras(400)
+    # Lecturas con un caracter cambiado, que pueden coincidir con más de un formato
+    muestras += [muestra[:posicion] + rnd.choice("@\"/-0A ") + muestra[posicion + 1:]
+                 for muestra in muestras for posicion in (rnd.randrange(len(muestra)),)]
+    orden = OrdenFormatos(perfil, intervalo)
+    for muestra in muestras:
+        assert Document(muestra, modo, orden).to_record() == Document(muestra, modo).to_record()
+
+
+def _segundos(muestra, modo):
+    # El mínimo de varias mediciones descarta las demoras ajenas a la lectura
+    return min(repeat(lambda: Document(muestra, modo), number=3, repeat=7)) / 3
+
+
+@pytest.mark.parametrize("nombre", list(ADVERSARIALES))
+def test_lecturas_adversariales_en_tiempo_lineal(nombre):
+    # En modo TOKENS el costo por caracter no crece con la longitud de la lectura: una lectura 10 veces más larga
+    # tarda bastante menos de 20 veces más (en modo REGEX, algunos casos tardan 90 veces más)
+    generar = ADVERSARIALES[nombre]
+    assert _segundos(generar(500), ModoLectura.TOKENS) < 20 * _segundos(generar(50), ModoLectura.TOKENS)
+
+
+def test_conversion_de_formato_declarado():
+    formato, = declarar_formato("prueba", TipoDocumento.DNI_GEN_3, "@", (
+        CampoFormato("dni", CIFRAS, convertir=lambda valor: valor.lstrip("0")), CampoFormato("nombres", NOMBRE)))
+    documento = Document("")
+    formato.extraer(documento, ["0012345678", "ANA"])
+    assert (documento.dni, documento.nombres) == ("12345678", "ANA")
+    # Las exportaciones y la validación trabajan con texto
+    formato, = declarar_formato("prueba", TipoDocumento.DNI_GEN_3, "@", (CampoFormato("dni", CIFRAS, convertir=int),))
+    with pytest.raises(TypeError):
+        formato.extraer(documento, ["12345678"])
+
+
+def test_cache_desaloja_la_usada_hace_mas_tiempo():
+    cache = DocumentCache(maximo=2)
+    a, b, c = _muestras(3, ("gen_tres_es",))
+    registro = cache.leer(a)
+    assert registro == Document(a).to_record()
+    cache.leer(b)
+    # La clave es la lectura normalizada
+    assert cache.leer(a.replace("@", "  @", 1)) is registro
+    cache.leer(c)
+    assert cache.leer(a) is registro
+    cache.leer(b)
+    assert cache.estadisticas() == {"aciertos": 2, "fallos": 4, "desalojos": 2, "vencimientos": 0, "guardadas": 2}
+
+
+def test_cache_vencimiento():
+    ahora = [0.0]
+    cache = DocumentCache(ttl=30, reloj=lambda: ahora[0])
+    registro = cache.leer(_GEN_TRES)
+    ahora[0] = 29.0
+    assert cache.leer(_GEN_TRES) is registro
+    ahora[0] = 31.0
+    assert cache.leer(_GEN_TRES) == registro
+    assert cache.estadisticas() == {"aciertos": 1, "fallos": 2, "desalojos": 0, "vencimientos": 1, "guardadas": 1}
+
+
+def test_cache_deshabilitada_no_guarda_lecturas():
+    cache = DocumentCache(habilitada=False)
+    for _ in range(3):
+        assert cache.leer(_GEN_TRES) == Document(_GEN_TRES).to_record()
+    assert len(cache) == 0
+    assert cache.estadisticas() == {"aciertos": 0, "fallos": 3, "desalojos": 0, "vencimientos": 0, "guardadas": 0}
+
+
+def test_cache_entre_hilos():
+    muestras = _muestras(40, _VALIDAS)
+    esperados = [Document(muestra).to_record() for muestra in muestras]
+    cache = DocumentCache(maximo=25)
+    with ThreadPoolExecutor(8) as executor:
+        for _ in range(5):
+            assert list(executor.map(cache.leer, muestras * 10)) == esperados * 10
+    estadisticas = cache.estadisticas()
+    assert estadisticas["aciertos"] + estadisticas["fallos"] == len(muestras) * 50
+    assert estadisticas["guardadas"] == len(cache) <= 25
+
+
+def test_parser_lecturas_binarias():
+    muestras = _muestras(100, _VALIDAS)
+    assert any(not muestra.isascii() for muestra in muestras)
+    parser = DocumentParser()
+    latin = DocumentParser(codificacion="latin-1")
+    for muestra in muestras:
+        registro = Document(muestra).to_record()
+        datos = muestra.encode("utf-8")
+        assert parser.parse(muestra) == registro
+        assert parser.parse(datos) == parser.parse(bytearray(datos)) == parser.parse(memoryview(datos)) == registro
+        assert latin.parse(muestra.encode("latin-1")) == registro
+
+
+def test_parser_utf8_invalido():
+    parser = DocumentParser()
+    # Los bytes inválidos se reemplazan por U+FFFD, y el nombre deja de ser válido
+    registro = parser.parse(_GEN_TRES.encode("utf-8").replace(b"LUCAS", b"LUC\xffAS"))
+    assert registro.tipo_documento is None and "LUC\ufffdAS" in registro.muestra
+    # Un caracter de varios bytes cortado al final de la lectura
+    datos = (_GEN_TRES + "@Ñ").encode("utf-8")[:-1]
+    assert parser.parse(datos) == Document(_GEN_TRES + "@\ufffd").to_record()
+
+
+@pytest.mark.parametrize("hilos", (1, 4, 16))
+def test_parser_compartido_entre_hilos(hilos):
+    muestras = _muestras(600)
+    esperados = [Document(muestra).to_record() for muestra in muestras]
+    metricas = Metricas()
+    cache = DocumentCache(maximo=200)
+    parser = DocumentParser(cache=cache, metricas=metricas)
+    partes = [muestras[numero::hilos] for numero in range(hilos)]
+    with ThreadPoolExecutor(hilos) as executor:
+        resultados = list(executor.map(lambda parte: [parser.parse(muestra.encode("utf-8")) for muestra in parte],
+                                       partes))
+    for numero, resultado in enumerate(resultados):
+        assert resultado == esperados[numero::hilos]
+    # Cada lectura que no estaba en la cache se procesó una vez y quedó en las métricas
+    procesadas = sum(metricas.a_dict()["rechazos"].values()) + sum(
+        lectura["total"] for lectura in metricas.a_dict()["lecturas"])
+    assert procesadas == cache.estadisticas()["fallos"] and cache.aciertos + cache.fallos == len(muestras)